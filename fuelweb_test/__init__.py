@@ -11,24 +11,104 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import atexit
 import functools
 import logging
 import os
+import Queue
+from repr import Repr
+import threading
+
+from fuelweb_test.settings import LOGS_DEBUG
 from fuelweb_test.settings import LOGS_DIR
+from fuelweb_test.settings import LOGS_QUEUE
+from fuelweb_test.settings import LOGWRAP_MAX_LENGTH
 
 if not os.path.exists(LOGS_DIR):
     os.makedirs(LOGS_DIR)
 
-logging.basicConfig(level=logging.DEBUG,
-                    format='%(asctime)s - %(levelname)s %(filename)s:'
-                    '%(lineno)d -- %(message)s',
-                    filename=os.path.join(LOGS_DIR, 'sys_test.log'),
-                    filemode='w')
 
-console = logging.StreamHandler()
-console.setLevel(logging.INFO)
+class QueueHandler(logging.Handler):
+    """Put log records to the queue to be handled by QueueListener.
+
+    Backport of logging.handlers.QueueHandler from python 3.
+    """
+
+    def __init__(self, queue):
+        logging.Handler.__init__(self)
+        self.queue = queue
+
+    def prepare(self, record):
+        # Format the message in the calling thread, arguments may be
+        # changed before the record is handled
+        msg = self.format(record)
+        record.message = msg
+        record.msg = msg
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+    def emit(self, record):
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+
+class QueueListener(object):
+    """Pass log records from the queue to the handlers in a thread.
+
+    Backport of logging.handlers.QueueListener from python 3.
+    """
+    _sentinel = None
+
+    def __init__(self, queue, *handlers):
+        self.queue = queue
+        self.handlers = handlers
+        self._thread = None
+
+    def _monitor(self):
+        while True:
+            record = self.queue.get()
+            if record is self._sentinel:
+                break
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._monitor,
+                                        name='QueueListener')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self.queue.put_nowait(self._sentinel)
+            self._thread.join()
+            self._thread = None
+
+
 formatter = logging.Formatter('%(asctime)s - %(levelname)s %(filename)s:'
                               '%(lineno)d -- %(message)s')
+
+file_handler = logging.FileHandler(os.path.join(LOGS_DIR, 'sys_test.log'),
+                                   mode='w')
+file_handler.setFormatter(formatter)
+logging.root.setLevel(logging.DEBUG if LOGS_DEBUG else logging.INFO)
+if LOGS_QUEUE:
+    log_queue = Queue.Queue()
+    logging.root.addHandler(QueueHandler(log_queue))
+    log_listener = QueueListener(log_queue, file_handler)
+    log_listener.start()
+    # Write the rest of records before logging.shutdown() at exit
+    atexit.register(log_listener.stop)
+else:
+    logging.root.addHandler(file_handler)
+
+console = logging.StreamHandler()
+console.setLevel(logging.INFO)
 console.setFormatter(formatter)
 
 logger = logging.getLogger(__name__)
@@ -45,18 +125,40 @@ logging.getLogger('paramiko.hostkeys').addFilter(NoDebugMessageFilter())
 logging.getLogger('iso8601.iso8601').addFilter(NoDebugMessageFilter())
 
 
+def summarize(obj, max_length=LOGWRAP_MAX_LENGTH):
+    """Return short representation of the object for debug messages
+
+    Big nested lists and dicts are cut without formatting them entirely.
+    The object is returned as is if max_length is 0.
+    """
+    if not max_length:
+        return obj
+    summary = Repr()
+    summary.maxlevel = 3
+    summary.maxtuple = summary.maxlist = summary.maxset = 10
+    summary.maxdict = 10
+    summary.maxstring = summary.maxother = max_length
+    text = summary.repr(obj)
+    if len(text) > max_length:
+        text = '{0}...'.format(text[:max_length])
+    return text
+
+
 def debug(logger):
     def wrapper(func):
         @functools.wraps(func)
         def wrapped(*args, **kwargs):
+            if not logger.isEnabledFor(logging.DEBUG):
+                return func(*args, **kwargs)
             logger.debug(
                 "Calling: {} with args: {} {}".format(
-                    func.__name__, args, kwargs
+                    func.__name__, summarize(args), summarize(kwargs)
                 )
             )
             result = func(*args, **kwargs)
             logger.debug(
-                "Done: {} with result: {}".format(func.__name__, result))
+                "Done: {} with result: {}".format(func.__name__,
+                                                  summarize(result)))
             return result
         return wrapped
     return wrapper
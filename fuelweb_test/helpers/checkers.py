@@ -23,6 +23,7 @@ from devops.helpers.helpers import wait
 
 from fuelweb_test import logger
 from fuelweb_test import logwrap
+from fuelweb_test.helpers.utils import run_on_nodes
 from fuelweb_test.helpers.utils import run_on_remote
 from fuelweb_test.helpers.utils import run_on_remote_get_results
 from fuelweb_test.settings import MASTER_IS_CENTOS7
@@ -472,10 +473,14 @@ def install_plugin_check_code(
 
 @logwrap
 def check_action_logs(scenario, postgres_actions):
+    action_names = []
+    action_groups = []
+
     def _check(_action, _group=False):
-        assert_true(postgres_actions.action_logs_contain(_action, _group),
-                    "Action logs are missed for '{0}'!".format(
-                        _action))
+        if _group:
+            action_groups.append(_action)
+        else:
+            action_names.append(_action)
 
     actions = [
         {
@@ -569,6 +574,12 @@ def check_action_logs(scenario, postgres_actions):
         for action_group in action['group']:
             _check(action_group, _group=True)
 
+    counts = postgres_actions.action_logs_counts(action_names, action_groups)
+    for log_filter in ('action_name', 'action_group'):
+        for action, count in sorted(counts[log_filter].items()):
+            assert_true(count > 0,
+                        "Action logs are missed for '{0}'!".format(action))
+
 
 def execute_query_on_collector(collector_remote, master_uuid, query,
                                collector_db='collector',
@@ -1177,18 +1188,18 @@ def check_log_lines_order(remote, log_file_path, line_matcher):
 
 def check_hiera_hosts(self, nodes, cmd):
     hiera_hosts = []
+    results = run_on_nodes(self.env, nodes, cmd)
     for node in nodes:
-        with self.env.d_env.get_ssh_to_remote(node['ip']) as remote:
-            hosts = ''.join(run_on_remote(remote, cmd)).strip().split(',')
-            logger.debug("hosts on {0} are {1}".format(node['hostname'],
-                                                       hosts))
-            if not hiera_hosts:
-                hiera_hosts = hosts
-                continue
-            else:
-                assert_true(set(hosts) == set(hiera_hosts),
-                            'Hosts on node {0} differ from'
-                            ' others'.format(node['hostname']))
+        hosts = results[node['ip']]['stdout_str'].strip().split(',')
+        logger.debug("hosts on {0} are {1}".format(node['hostname'],
+                                                   hosts))
+        if not hiera_hosts:
+            hiera_hosts = hosts
+            continue
+        else:
+            assert_true(set(hosts) == set(hiera_hosts),
+                        'Hosts on node {0} differ from'
+                        ' others'.format(node['hostname']))
 
 
 def check_client_smoke(remote):
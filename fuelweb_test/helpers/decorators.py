@@ -34,7 +34,9 @@ from proboscis.asserts import assert_equal
 from fuelweb_test import logger
 from fuelweb_test import settings
 from fuelweb_test.settings import MASTER_IS_CENTOS7
+from fuelweb_test.helpers.download import download_file
 from fuelweb_test.helpers.regenerate_repo import CustomRepo
+from fuelweb_test.helpers.utils import cond_upload
 from fuelweb_test.helpers.utils import get_current_env
 from fuelweb_test.helpers.utils import pull_out_logs_via_ssh
 from fuelweb_test.helpers.utils import store_astute_yaml
@@ -42,23 +44,18 @@ from fuelweb_test.helpers.utils import store_packages_json
 from fuelweb_test.helpers.utils import TimeStat
 
 
-def save_logs(url, path, auth_token=None, chunk_size=1024):
+def save_logs(url, path, auth_token=None,
+              chunk_size=settings.DOWNLOAD_CHUNK_SIZE):
     logger.info('Saving logs to "%s" file', path)
     headers = {}
     if auth_token is not None:
         headers['X-Auth-Token'] = auth_token
 
-    stream = requests.get(url, headers=headers, stream=True)
-    if stream.status_code != 200:
-        logger.error("%s %s: %s", stream.status_code, stream.reason,
-                     stream.content)
-        return
-
-    with open(path, 'wb') as fp:
-        for chunk in stream.iter_content(chunk_size=chunk_size):
-            if chunk:
-                fp.write(chunk)
-                fp.flush()
+    try:
+        download_file(url, path, headers=headers, chunk_size=chunk_size)
+    except requests.HTTPError as e:
+        logger.error("%s %s: %s", e.response.status_code, e.response.reason,
+                     e.response.content)
 
 
 def log_snapshot_after_test(func):
@@ -132,6 +129,43 @@ def json_parse(func):
     return wrapped
 
 
+def _count_change(client):
+    with client.changes_lock:
+        client.changes_count += 1
+
+
+def count_changes(func):
+    """Count calls of the decorated method of NailgunClient as changes made
+    via API, even if they have failed, so data derived from API (e.g.
+    nodes registry) could find out that it's outdated.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _count_change(args[0])
+    return wrapper
+
+
+def invalidate_cache(*groups):
+    """Drop cached responses of the groups after the decorated method
+    of NailgunClient is executed, even if it has failed. Also counts
+    the change like count_changes().
+    """
+    def wrapped(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _count_change(args[0])
+                if args[0].cache is not None:
+                    args[0].cache.invalidate(*groups)
+        return wrapper
+    return wrapped
+
+
 def upload_manifests(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
@@ -147,8 +181,8 @@ def upload_manifests(func):
                     return result
                 with environment.d_env.get_admin_remote() as remote:
                     remote.execute('rm -rf /etc/puppet/modules/*')
-                    remote.upload(settings.UPLOAD_MANIFESTS_PATH,
-                                  '/etc/puppet/modules/')
+                    cond_upload(remote, settings.UPLOAD_MANIFESTS_PATH,
+                                '/etc/puppet/modules/')
                     logger.info("Copying new site.pp from %s" %
                                 settings.SITEPP_FOR_UPLOAD)
                     remote.execute("cp %s /etc/puppet/manifests" %
@@ -256,7 +290,8 @@ def update_fuel(func):
                 # Update docker containers and restart them
                 environment.docker_actions.execute_in_containers(
                     cmd='yum clean expire-cache; yum update -y')
-                environment.docker_actions.restart_containers()
+                environment.docker_actions.restart_containers(
+                    parallel=True)
 
                 with environment.d_env.get_admin_remote() as remote:
                     # Update packages on master node
@@ -481,7 +516,7 @@ def check_repos_management(func):
                 for n in nailgun_nodes:
                     logger.debug("Check repository management on {0}"
                                  .format(n['ip']))
-                    with env.d_env.get_ssh_to_remote(n['ip']) as node_ssh:
+                    with env.get_ssh_to_remote(n['ip']) as node_ssh:
                         check_repo_managment(node_ssh)
             except Exception:
                 logger.error("An error happened during check repositories "
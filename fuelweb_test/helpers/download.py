@@ -0,0 +1,176 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import time
+
+import requests
+
+from fuelweb_test import logger
+from fuelweb_test.helpers.utils import md5sum
+from fuelweb_test.helpers.utils import run_concurrently
+from fuelweb_test.settings import DOWNLOAD_ATTEMPTS
+from fuelweb_test.settings import DOWNLOAD_CHUNK_SIZE
+from fuelweb_test.settings import DOWNLOAD_SEGMENTS
+
+
+class DownloadError(Exception):
+    pass
+
+
+class FileDownloader(object):
+    """Download a file over HTTP by big chunks.
+
+    If the server accepts Range requests, interrupted transfers are resumed
+    from the last written byte and the file may be downloaded by several
+    segments at the same time.
+    """
+
+    def __init__(self, url, path, headers=None,
+                 chunk_size=DOWNLOAD_CHUNK_SIZE, segments=DOWNLOAD_SEGMENTS,
+                 attempts=DOWNLOAD_ATTEMPTS, timeout=60):
+        """
+        :param url: String
+        :param path: String, local file
+        :param headers: dict of HTTP headers
+        :param chunk_size: Integer, bytes
+        :param segments: Integer, max number of parallel Range requests
+        :param attempts: Integer, attempts to download every segment
+        :param timeout: seconds to wait for data from the server
+        """
+        self.url = url
+        self.path = path
+        self.headers = headers or {}
+        self.chunk_size = chunk_size
+        self.segments = max(segments, 1)
+        self.attempts = max(attempts, 1)
+        self.timeout = timeout
+        self.size = None
+        self.resumable = False
+
+    def _get(self, first, last):
+        headers = dict(self.headers)
+        whole_file = first == 0 and last in (None, (self.size or 0) - 1)
+        if self.resumable and not whole_file:
+            headers['Range'] = 'bytes={0}-{1}'.format(
+                first, '' if last is None else last)
+        response = requests.get(self.url, headers=headers, stream=True,
+                                timeout=self.timeout)
+        response.raise_for_status()
+        if 'Range' in headers and response.status_code != 206:
+            response.close()
+            raise DownloadError('Server ignored the range {0} of {1}'.format(
+                headers['Range'], self.url))
+        return response
+
+    def _download_range(self, bounds):
+        """Download bytes from first to last (to the end of the file if last
+        is None) into the same position of the local file.
+
+        :param bounds: tuple (first, last)
+        :return: number of downloaded bytes
+        """
+        first, last = bounds
+        position = first
+        attempt = 1
+        with open(self.path, 'r+b') as fp:
+            while True:
+                try:
+                    response = self._get(position, last)
+                    fp.seek(position)
+                    for chunk in response.iter_content(
+                            chunk_size=self.chunk_size):
+                        fp.write(chunk)
+                        position += len(chunk)
+                    if last is not None and position != last + 1:
+                        raise DownloadError(
+                            'Connection closed after {0} of {1} bytes'.format(
+                                position - first, last + 1 - first))
+                    return position - first
+                except requests.HTTPError:
+                    raise
+                except (requests.RequestException, IOError,
+                        DownloadError) as e:
+                    if attempt >= self.attempts:
+                        raise
+                    attempt += 1
+                    logger.warning('Download of {0} is interrupted at byte '
+                                   '{1}: {2}. Attempt {3} of {4}'.format(
+                                       self.url, position, e, attempt,
+                                       self.attempts))
+                    if not self.resumable:
+                        # Only the whole file can be downloaded again
+                        position = first
+
+    def _probe(self):
+        """Return size of the file and whether Range requests are accepted"""
+        response = requests.head(self.url, headers=self.headers,
+                                 allow_redirects=True, timeout=self.timeout)
+        if response.status_code == 405:
+            return None, False
+        response.raise_for_status()
+        size = response.headers.get('content-length')
+        return (int(size) if size is not None else None,
+                response.headers.get('accept-ranges') == 'bytes')
+
+    def _split(self, size):
+        segments = min(self.segments, max(size // self.chunk_size, 1))
+        segment_size = -(-size // segments)
+        return [(first, min(first + segment_size, size) - 1)
+                for first in range(0, size, segment_size)]
+
+    def download(self, md5=None):
+        """Download the file and return its size
+
+        :param md5: String, expected md5 sum of the file
+            :rtype: Integer
+        :raises: requests.HTTPError, DownloadError
+        """
+        start = time.time()
+        size, self.resumable = self._probe()
+        self.size = size
+        with open(self.path, 'wb') as fp:
+            if size:
+                fp.truncate(size)
+
+        if size and self.resumable and self.segments > 1:
+            bounds = self._split(size)
+        else:
+            bounds = [(0, size - 1 if size else None)]
+        results, errors = run_concurrently(self._download_range, bounds,
+                                           concurrency=self.segments)
+        if errors:
+            raise errors.values()[0]
+
+        downloaded = sum(results.values())
+        if size is not None and downloaded != size:
+            raise DownloadError('Downloaded {0} bytes of {1} from {2}'.format(
+                downloaded, size, self.url))
+        if md5 is not None:
+            actual_md5 = md5sum(self.path)
+            if actual_md5 != md5:
+                raise DownloadError(
+                    'Checksum of {0} is {1}, expected {2}'.format(
+                        self.path, actual_md5, md5))
+        took = max(time.time() - start, 0.001)
+        logger.info('Downloaded {0:.1f} MB from {1} by {2} segment(s) in '
+                    '{3:.1f} seconds, {4:.1f} MB/s'.format(
+                        downloaded / 1024.0 ** 2, self.url, len(bounds),
+                        took, downloaded / 1024.0 ** 2 / took))
+        return downloaded
+
+
+def download_file(url, path, headers=None, md5=None, **kwargs):
+    """Download the file, see FileDownloader for keyword arguments"""
+    return FileDownloader(url, path, headers=headers, **kwargs).download(
+        md5=md5)
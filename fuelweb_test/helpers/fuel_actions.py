@@ -482,6 +482,35 @@ class PostgresActions(BaseActions):
         logger.info("Found log records with ids: {0}".format(logs))
         return len(logs) > 0
 
+    def action_logs_counts(self, actions=(), groups=(),
+                           table='action_logs'):
+        """Count log records of the actions and groups by one query
+
+        :param actions: list of action names
+        :param groups: list of action groups
+        :param table: String
+            :rtype: dict {'action_name': {action: count},
+                    'action_group': {group: count}}
+        """
+        counts = {'action_name': dict((action, 0) for action in actions),
+                  'action_group': dict((group, 0) for group in groups)}
+        subqueries = [
+            "select '\"'\"'{1}'\"'\"', {1}, count(id) from {0} where {1} "
+            "in ({2}) group by {1}".format(
+                table, log_filter,
+                ', '.join("'\"'\"'{0}'\"'\"'".format(value)
+                          for value in values))
+            for log_filter, values in counts.items() if values]
+        if not subqueries:
+            return counts
+        result = self.run_query('nailgun', ' union all '.join(subqueries))
+        for line in result.split('\n'):
+            row = [i.strip() for i in line.split('|')]
+            if len(row) == 3 and row[2].isdigit():
+                counts[row[0]][row[1]] = int(row[2])
+        logger.info("Found action log records: {0}".format(counts))
+        return counts
+
     def count_sent_action_logs(self, table='action_logs'):
         q = "select count(id) from {0} where is_sent = True".format(table)
         return int(self.run_query('nailgun', q))
@@ -619,34 +648,80 @@ class DockerActions(object):
     def list_containers(self):
         return self.admin_remote.execute('dockerctl list')['stdout']
 
-    def wait_for_ready_containers(self, timeout=300):
-        if MASTER_IS_CENTOS7:
-            return
-        cont_actions = []
-        for container in self.list_containers():
-            cont_action = BaseActions(self.admin_remote)
-            cont_action.container = container
-            cont_actions.append(cont_action)
+    # Containers which others depend on, they are restarted first in
+    # parallel mode, one group after another
+    base_containers = (('postgres', 'rabbitmq'), ('keystone',))
+
+    def get_containers_states(self, containers=None):
+        """Check the containers by one remote command
+
+        :param containers: list of container names, all by default
+            :rtype: dict {container: Boolean, True if it is ready}
+        """
+        containers = [c.strip() for c in
+                      containers or self.list_containers() if c.strip()]
+        cmd = ('for c in {0}; do (timeout 5 dockerctl check $c >/dev/null '
+               '2>&1; echo "$c $?") & done; wait'.format(' '.join(containers)))
+        states = dict((container, False) for container in containers)
+        for line in self.admin_remote.execute(cmd)['stdout']:
+            container, _, exit_code = line.strip().rpartition(' ')
+            if container in states:
+                states[container] = exit_code == '0'
+        return states
+
+    def wait_for_containers(self, containers, timeout=300):
+        states = {}
+
+        def all_ready():
+            states.update(self.get_containers_states(containers))
+            return all(states.values())
+
         try:
-            wait(lambda: all([cont_action.is_container_ready
-                              for cont_action in cont_actions]),
-                 timeout=timeout)
+            wait(all_ready, timeout=timeout)
         except TimeoutError:
-            failed_containers = [x.container for x in cont_actions
-                                 if not x.is_container_ready]
+            failed_containers = sorted(
+                container for container, ready in states.items()
+                if not ready)
             raise TimeoutError(
                 "Container(s) {0} failed to start in {1} seconds."
                 .format(failed_containers, timeout))
 
+    def wait_for_ready_containers(self, timeout=300):
+        if MASTER_IS_CENTOS7:
+            return
+        self.wait_for_containers(self.list_containers(), timeout=timeout)
+
     def restart_container(self, container):
         self.admin_remote.execute('dockerctl restart {0}'.format(container))
         cont_action = BaseActions(self.admin_remote)
         cont_action.container = container
         cont_action.wait_for_ready_container()
 
-    def restart_containers(self):
-        for container in self.list_containers():
-            self.restart_container(container)
+    def restart_containers(self, parallel=False, timeout=300):
+        """Restart all the containers
+
+        :param parallel: Boolean, restart containers of every group at the
+                         same time and wait for them all together, the
+                         groups are base_containers and then the rest
+        :param timeout: seconds to wait for every group in parallel mode
+        """
+        containers = [c.strip() for c in self.list_containers() if c.strip()]
+        if not parallel:
+            for container in containers:
+                self.restart_container(container)
+            return
+        groups = [[c for c in group if c in containers]
+                  for group in self.base_containers]
+        base = set(c for group in groups for c in group)
+        groups.append([c for c in containers if c not in base])
+        for group in groups:
+            if not group:
+                continue
+            logger.info('Restart containers {0}'.format(group))
+            self.admin_remote.execute(
+                'for c in {0}; do dockerctl restart $c & done; wait'.format(
+                    ' '.join(group)))
+            self.wait_for_containers(group, timeout=timeout)
 
     def execute_in_containers(self, cmd):
         for container in self.list_containers():
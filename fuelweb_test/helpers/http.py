@@ -12,13 +12,290 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import calendar
+import httplib
 import json
-import traceback
+import socket
+import threading
+import time
 import urllib2
+from StringIO import StringIO
 
 from keystoneclient.v2_0 import Client as KeystoneClient
 from keystoneclient import exceptions
 from fuelweb_test import logger
+from fuelweb_test.settings import HTTP_POOL_IDLE_TIMEOUT
+from fuelweb_test.settings import HTTP_POOL_MAXSIZE
+from fuelweb_test.settings import HTTP_POOL_MAXSIZE_PER_HOST
+from fuelweb_test.settings import HTTP_POOL_WAIT_TIMEOUT
+from fuelweb_test.settings import KEYSTONE_TOKEN_DEFAULT_TTL
+from fuelweb_test.settings import KEYSTONE_TOKEN_REFRESH_MARGIN
+
+
+class HTTPConnectionPool(object):
+    """Bounded pool of persistent HTTP(S) connections.
+
+    Connections are grouped by (scheme, host). The total amount of open
+    connections and the amount of connections to a single host are
+    limited; a caller which exceeds the limit waits until some connection
+    is released. Connections which stay idle longer than ``idle_timeout``
+    seconds are closed on the next pool access.
+    """
+
+    connection_classes = {
+        'http': httplib.HTTPConnection,
+        'https': httplib.HTTPSConnection,
+    }
+
+    def __init__(self, maxsize=HTTP_POOL_MAXSIZE,
+                 maxsize_per_host=HTTP_POOL_MAXSIZE_PER_HOST,
+                 idle_timeout=HTTP_POOL_IDLE_TIMEOUT,
+                 wait_timeout=HTTP_POOL_WAIT_TIMEOUT):
+        self.maxsize = maxsize
+        self.maxsize_per_host = maxsize_per_host
+        self.idle_timeout = idle_timeout
+        self.wait_timeout = wait_timeout
+        self._cond = threading.Condition(threading.Lock())
+        # (scheme, host) -> list of (connection, time of last release)
+        self._idle = {}
+        # (scheme, host) -> amount of connections given out
+        self._busy = {}
+
+    def _count(self, key=None):
+        if key is not None:
+            return len(self._idle.get(key, [])) + self._busy.get(key, 0)
+        return (sum(len(conns) for conns in self._idle.values()) +
+                sum(self._busy.values()))
+
+    def _evict_idle(self):
+        deadline = time.time() - self.idle_timeout
+        for key, conns in self._idle.items():
+            alive = []
+            for conn, last_used in conns:
+                if last_used < deadline:
+                    conn.close()
+                else:
+                    alive.append((conn, last_used))
+            self._idle[key] = alive
+
+    def _drop_oldest_idle(self):
+        """Close the oldest idle connection to free a slot in the pool."""
+        oldest = None
+        for key, conns in self._idle.items():
+            if conns and (oldest is None or conns[0][1] < oldest[1]):
+                oldest = (key, conns[0][1])
+        if oldest is None:
+            return False
+        conn, _ = self._idle[oldest[0]].pop(0)
+        conn.close()
+        return True
+
+    def acquire(self, scheme, host, timeout=socket._GLOBAL_DEFAULT_TIMEOUT):
+        """Return (connection, reused) for the given scheme and host."""
+        key = (scheme, host)
+        deadline = time.time() + self.wait_timeout
+        with self._cond:
+            while True:
+                self._evict_idle()
+                if self._idle.get(key):
+                    conn, _ = self._idle[key].pop()
+                    self._busy[key] = self._busy.get(key, 0) + 1
+                    return conn, True
+                if (self._count(key) < self.maxsize_per_host and
+                        (self._count() < self.maxsize or
+                         self._drop_oldest_idle())):
+                    self._busy[key] = self._busy.get(key, 0) + 1
+                    break
+                remains = deadline - time.time()
+                if remains <= 0:
+                    raise urllib2.URLError(
+                        'No free connection to {0} in the HTTP pool '
+                        'after {1} seconds'.format(host, self.wait_timeout))
+                self._cond.wait(remains)
+        try:
+            return self.connection_classes[scheme](host, timeout=timeout), \
+                False
+        except Exception:
+            self.release(scheme, host, None)
+            raise
+
+    def release(self, scheme, host, conn, reusable=True):
+        """Return a connection to the pool or close it if not reusable."""
+        key = (scheme, host)
+        with self._cond:
+            self._busy[key] -= 1
+            if conn is not None:
+                if reusable:
+                    self._idle.setdefault(key, []).append((conn, time.time()))
+                else:
+                    conn.close()
+            self._cond.notify()
+
+    def clear(self):
+        """Close all idle connections."""
+        with self._cond:
+            for conns in self._idle.values():
+                for conn, _ in conns:
+                    conn.close()
+            self._idle.clear()
+            self._cond.notify_all()
+
+
+connection_pool = HTTPConnectionPool()
+
+
+class KeepAliveMixin(object):
+    """Send urllib2 requests over persistent connections from the pool.
+
+    Response body is read completely, so the connection can be returned
+    to the pool immediately; the returned object has the same interface
+    as the one returned by the default urllib2 handlers.
+    """
+
+    def __init__(self, pool=None, **kwargs):
+        super(KeepAliveMixin, self).__init__(**kwargs)
+        self.pool = pool or connection_pool
+
+    def _do_keepalive_open(self, scheme, req):
+        host = req.get_host()
+        if not host:
+            raise urllib2.URLError('no host given')
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update(dict((k, v) for k, v in req.headers.items()
+                            if k not in headers))
+        headers = dict((name.title(), val) for name, val in headers.items())
+        headers['Connection'] = 'keep-alive'
+
+        method = req.get_method()
+        while True:
+            conn, reused = self.pool.acquire(scheme, host, req.timeout)
+            sent = False
+            try:
+                conn.request(method, req.get_selector(), req.data, headers)
+                sent = True
+                resp = conn.getresponse()
+                body = resp.read()
+            except socket.timeout as e:
+                self.pool.release(scheme, host, conn, reusable=False)
+                raise urllib2.URLError(e)
+            except (socket.error, httplib.HTTPException) as e:
+                self.pool.release(scheme, host, conn, reusable=False)
+                # The request may be sent again only if the server has
+                # closed the idle connection before it got the request,
+                # or if the request is idempotent
+                closed_idle = not sent or (
+                    isinstance(e, httplib.BadStatusLine) and
+                    (not e.line.strip("'") or
+                     e.line.startswith('No status line received')))
+                if reused and (closed_idle or method in ('GET', 'HEAD')):
+                    logger.debug('Persistent connection to {0} was closed '
+                                 'by server: {1!r}'.format(host, e))
+                    continue
+                raise urllib2.URLError(e)
+            except Exception:
+                self.pool.release(scheme, host, conn, reusable=False)
+                raise
+            self.pool.release(scheme, host, conn,
+                              reusable=not resp.will_close)
+            break
+
+        result = urllib2.addinfourl(StringIO(body), resp.msg,
+                                    req.get_full_url())
+        result.code = resp.status
+        result.msg = resp.reason
+        return result
+
+
+class KeepAliveHTTPHandler(KeepAliveMixin, urllib2.HTTPHandler):
+    def http_open(self, req):
+        return self._do_keepalive_open('http', req)
+
+
+class KeepAliveHTTPSHandler(KeepAliveMixin, urllib2.HTTPSHandler):
+    def https_open(self, req):
+        return self._do_keepalive_open('https', req)
+
+
+def build_keepalive_opener(pool=None):
+    return urllib2.build_opener(KeepAliveHTTPHandler(pool=pool),
+                                KeepAliveHTTPSHandler(pool=pool))
+
+
+class KeystoneTokenCache(object):
+    """Keystone token shared by all HTTP clients of the same master node.
+
+    Token is refreshed in advance, ``refresh_margin`` seconds before its
+    expiration, so requests are rarely rejected with 401 error.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls, keystone_url, credentials):
+        key = (keystone_url,) + tuple(sorted(credentials.items()))
+        with cls._instances_lock:
+            if key not in cls._instances:
+                cls._instances[key] = cls(keystone_url, credentials)
+            return cls._instances[key]
+
+    def __init__(self, keystone_url, credentials,
+                 refresh_margin=KEYSTONE_TOKEN_REFRESH_MARGIN):
+        self.keystone_url = keystone_url
+        self.creds = credentials
+        self.refresh_margin = refresh_margin
+        self._lock = threading.RLock()
+        self._token = None
+        self._expires = None
+
+    @staticmethod
+    def _get_expiration(keystone):
+        try:
+            return calendar.timegm(keystone.auth_ref.expires.utctimetuple())
+        except Exception:
+            logger.debug('Unable to get expiration time of the token, '
+                         'assume it is valid for {0} seconds'
+                         .format(KEYSTONE_TOKEN_DEFAULT_TTL))
+            return time.time() + KEYSTONE_TOKEN_DEFAULT_TTL
+
+    def authenticate(self):
+        with self._lock:
+            try:
+                logger.info('Initialize keystoneclient with url %s',
+                            self.keystone_url)
+                keystone = KeystoneClient(
+                    auth_url=self.keystone_url, **self.creds)
+                # it depends on keystone version, some versions doing auth
+                # explicitly some don't, but we are making it explicitly
+                # always
+                keystone.authenticate()
+            except exceptions.AuthorizationFailure:
+                logger.warning(
+                    'Cant establish connection to keystone with url %s',
+                    self.keystone_url)
+                return None
+            self._token = keystone.auth_token
+            self._expires = self._get_expiration(keystone)
+            logger.debug('Authorization token is successfully updated, '
+                         'it expires in {0:.0f} seconds'
+                         .format(self._expires - time.time()))
+            return self._token
+
+    def invalidate(self):
+        with self._lock:
+            self._token = None
+            self._expires = None
+
+    @property
+    def token(self):
+        with self._lock:
+            if (self._token is not None and
+                    time.time() >= self._expires - self.refresh_margin):
+                logger.debug('Authorization token expires soon, '
+                             'refreshing it')
+                self.authenticate()
+            return self._token
 
 
 class HTTPClient(object):
@@ -29,42 +306,19 @@ class HTTPClient(object):
         self.url = url
         self.keystone_url = keystone_url
         self.creds = dict(credentials, **kwargs)
-        self.keystone = None
-        self.opener = urllib2.build_opener(urllib2.HTTPHandler)
+        self.token_cache = KeystoneTokenCache.get_instance(
+            self.keystone_url, self.creds)
+        self.opener = build_keepalive_opener()
 
     def authenticate(self):
-        try:
-            logger.info('Initialize keystoneclient with url %s',
-                        self.keystone_url)
-            self.keystone = KeystoneClient(
-                auth_url=self.keystone_url, **self.creds)
-            # it depends on keystone version, some versions doing auth
-            # explicitly some don't, but we are making it explicitly always
-            self.keystone.authenticate()
-            logger.debug('Authorization token is successfully updated')
-        except exceptions.AuthorizationFailure:
-            logger.warning(
-                'Cant establish connection to keystone with url %s',
-                self.keystone_url)
+        self.token_cache.authenticate()
 
     @property
     def token(self):
-        if self.keystone is not None:
-            try:
-                return self.keystone.auth_token
-            except exceptions.AuthorizationFailure:
-                logger.warning(
-                    'Cant establish connection to keystone with url %s',
-                    self.keystone_url)
-            except exceptions.Unauthorized:
-                logger.warning("Keystone returned unauthorized error, trying "
-                               "to pass authentication.")
-                self.authenticate()
-                return self.keystone.auth_token
-        return None
+        return self.token_cache.token
 
-    def get(self, endpoint):
-        req = urllib2.Request(self.url + endpoint)
+    def get(self, endpoint, headers=None):
+        req = urllib2.Request(self.url + endpoint, headers=headers or {})
         return self._open(req)
 
     def post(self, endpoint, data=None, content_type="application/json"):
@@ -95,6 +349,9 @@ class HTTPClient(object):
                 logger.warning('Authorization failure: {0}'.format(e.read()))
                 self.authenticate()
                 return self._get_response(req)
+            elif e.code == 304:
+                # Not Modified, answer to a conditional request
+                raise
             elif e.code == 504:
                 logger.error("Got HTTP Error 504: "
                              "Gateway Time-out: {}".format(e.read()))
@@ -106,22 +363,106 @@ class HTTPClient(object):
                 raise
 
     def _get_response(self, req):
-        if self.token is not None:
-            try:
-                logger.debug('Set X-Auth-Token to {0}'.format(self.token))
-                req.add_header("X-Auth-Token", self.token)
-            except exceptions.AuthorizationFailure:
-                logger.warning('Failed with auth in http _get_response')
-                logger.warning(traceback.format_exc())
+        token = self.token
+        if token is not None:
+            req.add_header("X-Auth-Token", token)
         return self.opener.open(req)
 
 
+class ResponseCache(object):
+    """Cache of responses to GET requests.
+
+    Every cached endpoint belongs to a group with its own TTL. Expired
+    entry which was returned with ETag is revalidated with a conditional
+    request. Writing methods invalidate whole groups of entries, response
+    to a request which was sent before the invalidation isn't cached.
+    """
+
+    def __init__(self, ttls):
+        self.ttls = ttls
+        # endpoint -> [group, body, etag, expiration time]
+        self._entries = {}
+        self._lock = threading.Lock()
+        # Incremented by invalidation of a group or of all the groups
+        self._generations = {}
+        self._cleared = 0
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    @property
+    def stats(self):
+        with self._lock:
+            return self._stats()
+
+    def _stats(self):
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations,
+                'entries': len(self._entries)}
+
+    def _generation(self, group):
+        return self._cleared, self._generations.get(group, 0)
+
+    def get(self, client, group, endpoint):
+        """Return body of the response to GET request to the endpoint."""
+        with self._lock:
+            entry = self._entries.get(endpoint)
+            generation = self._generation(group)
+            if entry is not None and entry[3] > time.time():
+                self.hits += 1
+                stats = self._stats()
+                body = entry[1]
+            else:
+                body = None
+        if body is not None:
+            logger.debug('Got {0} from cache, stats: {1}'.format(
+                endpoint, stats))
+            return body
+
+        headers = {}
+        if entry is not None and entry[2]:
+            headers['If-None-Match'] = entry[2]
+        try:
+            response = client.get(endpoint, headers=headers)
+        except urllib2.HTTPError as e:
+            if e.code != 304 or entry is None:
+                raise
+            # Server has confirmed that the body is still up to date
+            with self._lock:
+                self.revalidations += 1
+                entry[3] = time.time() + self.ttls[group]
+            return entry[1]
+
+        body = response.read()
+        with self._lock:
+            self.misses += 1
+            if self._generation(group) == generation:
+                self._entries[endpoint] = [group, body,
+                                           response.info().getheader('ETag'),
+                                           time.time() + self.ttls[group]]
+        return body
+
+    def invalidate(self, *groups):
+        """Drop cached entries of the groups or all entries if no groups."""
+        with self._lock:
+            if groups:
+                for group in groups:
+                    self._generations[group] = \
+                        self._generations.get(group, 0) + 1
+            else:
+                self._cleared += 1
+            for endpoint, entry in self._entries.items():
+                if not groups or entry[0] in groups:
+                    del self._entries[endpoint]
+
+
 class HTTPClientZabbix(object):
     """HTTPClientZabbix."""  # TODO documentation
 
     def __init__(self, url):
         self.url = url
-        self.opener = urllib2.build_opener(urllib2.HTTPHandler)
+        self.opener = build_keepalive_opener()
 
     def get(self, endpoint=None, cookie=None):
         req = urllib2.Request(self.url + endpoint)
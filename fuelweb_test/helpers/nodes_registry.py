@@ -0,0 +1,223 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import copy
+import threading
+import time
+import traceback
+
+from netaddr import EUI
+
+from fuelweb_test import logger
+from fuelweb_test.settings import ATTEMPTS
+from fuelweb_test.settings import NAILGUN_NODES_REGISTRY_MAX_AGE
+from fuelweb_test.settings import TIMEOUT
+
+
+class NailgunNodesRegistry(object):
+    """Indexes of nailgun nodes built from one snapshot of the nodes list.
+
+    The snapshot is taken again if it's older than max_age seconds, if
+    the nailgun client has changed something via API since it was taken
+    or if it is invalidated explicitly. If the nodes list can't be taken,
+    the previous snapshot is kept and stays stale.
+    """
+
+    def __init__(self, client, max_age=NAILGUN_NODES_REGISTRY_MAX_AGE):
+        """
+        :param client: NailgunClient
+        :param max_age: float, seconds
+        """
+        self.client = client
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # Threads waiting for nodes share one request of the nodes list
+        self._refresh_lock = threading.Lock()
+        self._nodes = []
+        self._by_mac = {}
+        self._by_fqdn = {}
+        self._by_name = {}
+        self._by_id = {}
+        self._updated = None
+        self._changes_count = None
+
+    @property
+    def stale(self):
+        return (self._updated is None or
+                time.time() - self._updated > self.max_age or
+                self._changes_count != self.client.changes_count)
+
+    def invalidate(self):
+        self._updated = None
+
+    def _list_nodes(self):
+        logger.debug('Verify that nailgun api is running')
+        attempts = ATTEMPTS
+        while True:
+            logger.debug(
+                'current timeouts is {0} count of '
+                'attempts is {1}'.format(TIMEOUT, attempts))
+            try:
+                return self.client.list_nodes()
+            except Exception:
+                logger.debug(traceback.format_exc())
+                attempts -= 1
+                if attempts <= 0:
+                    return None
+                time.sleep(TIMEOUT)
+
+    def refresh(self):
+        """Take a new snapshot of nailgun nodes and rebuild the indexes."""
+        changes_count = self.client.changes_count
+        nodes = self._list_nodes()
+        if nodes is None:
+            # Don't replace the snapshot by an empty one and don't mark it
+            # as fresh, so the next lookup asks nailgun again
+            logger.error('Failed to get the list of nailgun nodes, keep the '
+                         'previous snapshot of {0} nodes'.format(
+                             len(self._nodes)))
+            return
+        logger.debug('Got nodes {0}'.format(nodes))
+        by_mac, by_fqdn, by_name, by_id = {}, {}, {}, {}
+        for node in nodes:
+            for iface in node['meta']['interfaces']:
+                by_mac[EUI(iface['mac'])] = node
+            by_fqdn[node['meta']['system'].get('fqdn')] = node
+            by_name[node['name']] = node
+            by_id[node['id']] = node
+        with self._lock:
+            self._nodes = nodes
+            self._by_mac, self._by_fqdn = by_mac, by_fqdn
+            self._by_name, self._by_id = by_name, by_id
+            self._updated = time.time()
+            self._changes_count = changes_count
+
+    def _indexes(self):
+        if self.stale:
+            with self._refresh_lock:
+                if self.stale:
+                    self.refresh()
+        with self._lock:
+            return (self._nodes, self._by_mac, self._by_fqdn,
+                    self._by_name, self._by_id)
+
+    @staticmethod
+    def _copy(node):
+        # Callers are allowed to modify returned nodes
+        return copy.deepcopy(node) if node is not None else None
+
+    @property
+    def nodes(self):
+        return [self._copy(node) for node in self._indexes()[0]]
+
+    def get_by_macs(self, macs):
+        """Return node which has all the MAC addresses.
+
+        :param macs: iterable of MAC addresses (strings or EUI)
+            :rtype: Dict or None
+        """
+        macs = {EUI(mac) for mac in macs}
+        if not macs:
+            return None
+        by_mac = self._indexes()[1]
+        node = by_mac.get(next(iter(macs)))
+        if node is None:
+            return None
+        node_macs = {EUI(i['mac']) for i in node['meta']['interfaces']}
+        # Because our HAproxy may create some interfaces
+        if macs.issubset(node_macs):
+            return self._copy(node)
+
+    def get_by_mac(self, mac):
+        return self._copy(self._indexes()[1].get(EUI(mac)))
+
+    def get_by_fqdn(self, fqdn):
+        return self._copy(self._indexes()[2].get(fqdn))
+
+    def get_by_name(self, name):
+        return self._copy(self._indexes()[3].get(name))
+
+    def get_by_id(self, node_id):
+        return self._copy(self._indexes()[4].get(node_id))
+
+    def get_by_base_name(self, base_name):
+        for node in self._indexes()[0]:
+            if base_name in node['name']:
+                return self._copy(node)
+
+
+class DevopsNodesIndex(object):
+    """Index of devops nodes by MAC addresses of their interfaces.
+
+    The index is built once and rebuilt only if it's invalidated (e.g.
+    when the devops environment is created) or if a lookup misses it.
+    """
+
+    def __init__(self, environment):
+        """
+        :param environment: EnvironmentModel
+        """
+        self.environment = environment
+        self._lock = threading.Lock()
+        self._by_mac = None
+        self._macs = None
+
+    def invalidate(self):
+        with self._lock:
+            self._by_mac = self._macs = None
+
+    def _indexes(self, rebuild=False):
+        with self._lock:
+            if rebuild or self._by_mac is None:
+                logger.debug('Build index of devops nodes by MAC addresses')
+                by_mac, macs = {}, {}
+                for node in self.environment.d_env.nodes():
+                    node_macs = {EUI(i.mac_address) for i in node.interfaces}
+                    for mac in node_macs:
+                        by_mac[mac] = node
+                    macs[node.name] = node_macs
+                self._by_mac, self._macs = by_mac, macs
+            return self._by_mac, self._macs
+
+    def get_by_mac(self, mac):
+        """Return devops node which has an interface with the MAC address.
+
+        :param mac: String or EUI
+            :rtype: Node or None
+        """
+        return self.get_by_macs([mac])[0]
+
+    def get_by_macs(self, macs):
+        """Bulk lookup of devops nodes, see get_by_mac().
+
+        :param macs: List of Strings or EUI
+            :rtype: List of Nodes (None for unknown MAC addresses)
+        """
+        macs = [EUI(mac) for mac in macs]
+        by_mac = self._indexes()[0]
+        if not all(mac in by_mac for mac in macs):
+            # Nodes could be added since the index was built
+            by_mac = self._indexes(rebuild=True)[0]
+        return [by_mac.get(mac) for mac in macs]
+
+    def get_macs(self, devops_node):
+        """Return set of MAC addresses of the devops node interfaces.
+
+        :param devops_node: Node
+            :rtype: Set of EUI
+        """
+        macs = self._indexes()[1]
+        if devops_node.name not in macs:
+            macs = self._indexes(rebuild=True)[1]
+        return macs.get(devops_node.name, set())
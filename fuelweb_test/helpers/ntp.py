@@ -20,6 +20,7 @@ from proboscis.asserts import assert_true
 
 from fuelweb_test import logger
 from fuelweb_test import logwrap
+from fuelweb_test.helpers.utils import run_concurrently
 from fuelweb_test.settings import MASTER_IS_CENTOS7
 
 
@@ -43,11 +44,16 @@ class GroupNtpSync(object):
 
         if nailgun_nodes:
             # 1. Create a list of 'Ntp' connections to the nodes
-            self.ntps.extend([
-                Ntp.get_ntp(env.d_env.get_ssh_to_remote(node['ip']),
-                            'node-{0}'.format(node['id']),
-                            env.get_admin_node_ip())
-                for node in nailgun_nodes])
+            admin_ip = env.get_admin_node_ip()
+            ntps, errors = run_concurrently(
+                lambda i: Ntp.get_ntp(
+                    env.get_ssh_to_remote(nailgun_nodes[i]['ip']),
+                    'node-{0}'.format(nailgun_nodes[i]['id']),
+                    admin_ip),
+                range(len(nailgun_nodes)))
+            if errors:
+                raise errors.values()[0]
+            self.ntps.extend([ntps[i] for i in range(len(nailgun_nodes))])
 
     def __enter__(self):
         return self
@@ -72,6 +78,31 @@ class GroupNtpSync(object):
         return [(ntp.node_name, ntp.peers)
                 for ntp in self.ntps if not ntp.is_connected]
 
+    def _run_on_nodes(self, phase, method):
+        """Call the method of every 'Ntp' at the same time, report time
+        spent on every node and raise the first error if any."""
+        spent = {}
+
+        def _call(ntp):
+            start = time.time()
+            try:
+                return getattr(ntp, method)()
+            finally:
+                spent[ntp] = time.time() - start
+
+        results, errors = run_concurrently(_call, self.ntps)
+        logger.info("{0}: {1}".format(phase, ', '.join(
+            "'{0}' {1} in {2:.1f}s".format(
+                ntp.node_name, 'failed' if ntp in errors else 'done',
+                spent.get(ntp, 0))
+            for ntp in self.ntps)))
+        if errors:
+            for ntp, error in errors.items():
+                logger.error("{0} failed on '{1}': {2}".format(
+                    phase, ntp.node_name, error))
+            raise errors.values()[0]
+        return results
+
     def do_sync_time(self, ntps=None):
         # 0. 'ntps' can be filled by __init__() or outside the class
         self.ntps = ntps or self.ntps
@@ -80,16 +111,16 @@ class GroupNtpSync(object):
                              "the time in self.ntps")
 
         # 1. Set actual time on all nodes via 'ntpdate'
-        [ntp.set_actual_time() for ntp in self.ntps]
+        self._run_on_nodes('Set actual time', 'set_actual_time')
         assert_true(self.is_synchronized, "Time on nodes was not set:"
                     " \n{0}".format(self.report_not_synchronized()))
 
         # 2. Restart NTPD service
-        [ntp.stop() for ntp in self.ntps]
-        [ntp.start() for ntp in self.ntps]
+        self._run_on_nodes('Stop NTPD', 'stop')
+        self._run_on_nodes('Start NTPD', 'start')
 
         # 3. Wait for established peers
-        [ntp.wait_peer() for ntp in self.ntps]
+        self._run_on_nodes('Wait for NTPD peers', 'wait_peer')
         assert_true(self.is_connected, "Time on nodes was not synchronized:"
                     " \n{0}".format(self.report_not_connected()))
 
@@ -30,6 +30,7 @@ from proboscis.asserts import assert_true
 
 from fuelweb_test import logger
 from fuelweb_test import settings
+from fuelweb_test.helpers.utils import run_on_nodes
 
 
 patching_validation_schema = {
@@ -303,10 +304,7 @@ def connect_slaves_to_repo(environment, nodes, repo_name):
             "yum -y clean all",
         ]
 
-    for slave in nodes:
-        with environment.d_env.get_ssh_to_remote(slave['ip']) as remote:
-            for cmd in cmds:
-                environment.execute_remote_cmd(remote, cmd, exit_code=0)
+    run_on_nodes(environment, nodes, cmds)
 
 
 def connect_admin_to_repo(environment, repo_name):
@@ -334,6 +332,11 @@ def connect_admin_to_repo(environment, repo_name):
 
 
 def update_packages(environment, remote, packages, exclude_packages=None):
+    for cmd in get_update_packages_cmds(packages, exclude_packages):
+        environment.execute_remote_cmd(remote, cmd, exit_code=0)
+
+
+def get_update_packages_cmds(packages, exclude_packages=None):
     if settings.OPENSTACK_RELEASE == settings.OPENSTACK_RELEASE_UBUNTU:
         cmds = [
             'apt-get -o Dpkg::Options::="--force-confdef" '
@@ -349,8 +352,7 @@ def update_packages(environment, remote, packages, exclude_packages=None):
             "yum -y update --nogpgcheck {0} -x '{1}'".format(
                 ' '.join(packages), ','.join(exclude_packages or []))
         ]
-    for cmd in cmds:
-        environment.execute_remote_cmd(remote, cmd, exit_code=0)
+    return cmds
 
 
 def update_packages_on_slaves(environment, slaves, packages=None,
@@ -358,9 +360,8 @@ def update_packages_on_slaves(environment, slaves, packages=None,
     if not packages:
         # Install all updates
         packages = ' '
-    for slave in slaves:
-        with environment.d_env.get_ssh_to_remote(slave['ip']) as remote:
-            update_packages(environment, remote, packages, exclude_packages)
+    run_on_nodes(environment, slaves,
+                 get_update_packages_cmds(packages, exclude_packages))
 
 
 def get_slaves_ips_by_role(slaves, role=None):
@@ -504,7 +505,7 @@ def validate_fix_apply_step(apply_step, environment, slaves):
                                                      apply_step['type']))
         command = apply_step['command']
     # remotes sessions .clear() placed in run_actions()
-    remotes = [environment.d_env.get_ssh_to_remote(ip) for ip in remotes_ips] \
+    remotes = [environment.get_ssh_to_remote(ip) for ip in remotes_ips] \
         if command else []
     devops_nodes = devops_nodes if devops_action else []
     return command, remotes, devops_action, devops_nodes
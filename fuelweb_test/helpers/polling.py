@@ -0,0 +1,227 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import random
+import time
+import traceback
+
+from devops.error import TimeoutError
+
+from fuelweb_test import logger
+from fuelweb_test.helpers.utils import get_test_method_name
+from fuelweb_test.helpers.utils import run_concurrently
+from fuelweb_test.helpers.utils import update_yaml
+from fuelweb_test.settings import CONCURRENCY
+from fuelweb_test.settings import LOGS_DIR
+from fuelweb_test.settings import POLL_BACKOFF_FACTOR
+from fuelweb_test.settings import POLL_JITTER
+from fuelweb_test.settings import POLL_MIN_INTERVAL
+
+
+class ProgressStalledError(TimeoutError):
+    """Progress has not changed for too long."""
+
+
+class AdaptivePoller(object):
+    """Poll a predicate with growing intervals.
+
+    The first polls are done every min_interval seconds, then the interval
+    grows by factor up to max_interval. Every interval is randomized by
+    +/- jitter share of it. If progress callable is given, the interval
+    drops back to min_interval each time the progress value advances.
+    """
+
+    def __init__(self, timeout=60, max_interval=5,
+                 min_interval=POLL_MIN_INTERVAL, factor=POLL_BACKOFF_FACTOR,
+                 jitter=POLL_JITTER, name=None):
+        self.timeout = timeout
+        self.max_interval = max_interval
+        self.min_interval = min(min_interval, max_interval)
+        self.factor = factor
+        self.jitter = jitter
+        self.name = name
+        self.polls = 0
+        self.waited = 0
+
+    def _next_interval(self, interval, advanced):
+        if advanced:
+            return self.min_interval
+        return min(interval * self.factor, self.max_interval)
+
+    def _randomize(self, interval):
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def wait(self, predicate, progress=None, timeout_msg=None):
+        """Call predicate until it returns true value and return the value
+
+        :param predicate: callable without arguments
+        :param progress: callable without arguments returning a number
+        :param timeout_msg: message of TimeoutError
+        """
+        start = time.time()
+        deadline = start + self.timeout
+        interval = self.min_interval
+        last_progress = None
+        self.polls = 0
+        try:
+            while True:
+                self.polls += 1
+                result = predicate()
+                if result:
+                    return result
+                advanced = False
+                if progress is not None:
+                    value = progress()
+                    advanced = last_progress is not None and \
+                        value > last_progress
+                    last_progress = value
+                now = time.time()
+                if now >= deadline:
+                    raise TimeoutError(
+                        timeout_msg or 'Waiting timed out after {0} seconds'
+                        .format(self.timeout))
+                time.sleep(min(self._randomize(interval), deadline - now))
+                interval = self._next_interval(interval, advanced)
+        finally:
+            self.waited = time.time() - start
+            logger.debug('Waiting {0} took {1} polls and {2:.1f} '
+                         'seconds'.format(self.name or predicate, self.polls,
+                                          self.waited))
+
+
+def wait_adaptive(predicate, timeout=60, interval=5, progress=None,
+                  timeout_msg=None, name=None, **kwargs):
+    """Drop-in replacement of devops wait() with adaptive polling.
+
+    Given interval is the upper limit of intervals between polls, see
+    AdaptivePoller for other keyword arguments.
+    """
+    poller = AdaptivePoller(timeout=timeout, max_interval=interval,
+                            name=name, **kwargs)
+    return poller.wait(predicate, progress=progress, timeout_msg=timeout_msg)
+
+
+def wait_nodes_ready(check, nodes, timeout, concurrency=CONCURRENCY,
+                     name='readiness'):
+    """Wait until all the nodes are ready, nodes are checked at the same
+    time in a bounded pool of threads with one shared deadline.
+
+    :param check: callable check(node, timeout) which waits until the node
+                  is ready for timeout seconds at most or raises an error
+    :param nodes: list of hashable items, e.g. node names
+    :param timeout: seconds for all the nodes
+    :param concurrency: max number of nodes checked at the same time
+    :param name: name of the check for logs and errors
+        :rtype: Dict, report {node: {'ready': Bool, 'took': seconds,
+                'error': exception or None}}
+    :raises: TimeoutError if some nodes have not become ready in time, or
+             the first other error raised by the check
+    """
+    deadline = time.time() + timeout
+    start = time.time()
+    took = {}
+
+    def _check(node):
+        try:
+            check(node, max(deadline - time.time(), 0))
+        finally:
+            took[node] = time.time() - start
+
+    _, errors = run_concurrently(_check, nodes,
+                                 concurrency=concurrency)
+    report = dict(
+        (node, {'ready': node not in errors,
+                'took': round(took.get(node, 0), 1),
+                'error': errors.get(node)})
+        for node in nodes)
+    logger.info('{0} report: {1}'.format(name, ', '.join(
+        '{0}: {1} in {2}s'.format(getattr(node, 'name', node),
+                                  'ready' if r['ready'] else 'NOT ready',
+                                  r['took'])
+        for node, r in report.items())))
+    if errors:
+        other_errors = [e for e in errors.values()
+                        if not isinstance(e, TimeoutError)]
+        if other_errors:
+            raise other_errors[0]
+        raise TimeoutError('{0} failed on nodes: {1}'.format(
+            name, '; '.join('{0}: {1}'.format(getattr(node, 'name', node), e)
+                            for node, e in errors.items())))
+    return report
+
+
+class ProgressTracker(object):
+    """Time series of progress samples of a long running task.
+
+    Estimates time left until the progress reaches 100 and detects a stall
+    if the progress has not changed for stall_timeout seconds (0 disables
+    the detection).
+    """
+
+    def __init__(self, name, stall_timeout=0):
+        self.name = name
+        self.stall_timeout = stall_timeout
+        self.start = time.time()
+        # list of [seconds since start, new progress value]
+        self.samples = []
+        self.changed = self.start
+
+    @property
+    def progress(self):
+        return self.samples[-1][1] if self.samples else None
+
+    @property
+    def eta(self):
+        """Seconds left according to the average speed or None"""
+        # Samples are added only when progress changes
+        if len(self.samples) < 2:
+            return None
+        first, last = self.samples[0], self.samples[-1]
+        speed = float(last[1] - first[1]) / (last[0] - first[0])
+        if speed <= 0:
+            return None
+        return (100 - last[1]) / speed
+
+    def add(self, progress):
+        now = time.time()
+        if progress != self.progress:
+            self.changed = now
+            self.samples.append([round(now - self.start, 1), progress])
+            eta = self.eta
+            logger.info('{0} progress is {1}%, ETA {2}'.format(
+                self.name, progress,
+                '{0:.0f} seconds'.format(eta) if eta is not None
+                else 'unknown'))
+
+    def check_stall(self):
+        stalled = time.time() - self.changed
+        if self.stall_timeout and stalled > self.stall_timeout:
+            raise ProgressStalledError(
+                '{0} progress has not changed from {1}% for {2:.0f} '
+                'seconds, samples [seconds, progress]: {3}'.format(
+                    self.name, self.progress, stalled, self.samples))
+
+    def save_timeline(self):
+        """Add the samples to the timeline file of the current test"""
+        if not self.samples:
+            return
+        test_name = get_test_method_name() or 'timeline'
+        path = os.path.join(LOGS_DIR, '{0}-progress.yaml'.format(test_name))
+        try:
+            update_yaml([self.name], self.samples, is_uniq=False,
+                        yaml_file=path)
+        except Exception:
+            logger.error('Error storing progress timeline of {0}: {1}'.format(
+                self.name, traceback.format_exc()))
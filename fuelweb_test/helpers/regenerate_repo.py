@@ -24,6 +24,7 @@ from xml.etree import ElementTree
 from fuelweb_test import logger
 from fuelweb_test import settings
 from fuelweb_test.helpers.utils import install_pkg
+from fuelweb_test.helpers.utils import run_on_remote_iter
 
 
 def regenerate_ubuntu_repo(remote, path):
@@ -301,7 +302,9 @@ class CustomRepo(object):
         cmd = ('fgrep -h -e " Depends: " -e "{0}" -e "{1}" '
                '/var/log/docker-logs/remote/node-*/'
                'puppet*.log'.format(err_start, err_end))
-        result = self.remote.execute(cmd)['stdout']
+        # fgrep returns 1 if nothing is found
+        result = run_on_remote_iter(self.remote, cmd, assert_ec_equal=[0, 1],
+                                    raise_on_assert=False)
 
         err_deps = {}
         err_deps_key = ''
@@ -338,7 +341,9 @@ class CustomRepo(object):
 
         cmd = ('fgrep -h -e "Error: Package: " -e " Requires: " /var/log/'
                'docker-logs/remote/node-*/puppet*.log')
-        result = self.remote.execute(cmd)['stdout']
+        # fgrep returns 1 if nothing is found
+        result = run_on_remote_iter(self.remote, cmd, assert_ec_equal=[0, 1],
+                                    raise_on_assert=False)
 
         err_deps = {}
         err_deps_key = ''
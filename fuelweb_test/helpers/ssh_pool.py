@@ -0,0 +1,175 @@
+#    Copyright 2016 Mirantis, Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import time
+
+from fuelweb_test import logger
+from fuelweb_test.settings import SSH_POOL_IDLE_TIMEOUT
+from fuelweb_test.settings import SSH_POOL_PROBE_TIMEOUT
+
+
+class SSHConnectionPool(object):
+    """Process-wide pool of authenticated SSH connections.
+
+    Connections are kept per (ip, login). A connection is given to one
+    user at a time, so concurrent users of the same node get different
+    connections. Idle connections are closed if they stay idle longer
+    than ``idle_timeout`` seconds. Before reuse a connection runs a
+    command on the node, a transport can stay active after the node is
+    rebooted or reverted, so it's not enough to check its state.
+    """
+
+    def __init__(self, idle_timeout=SSH_POOL_IDLE_TIMEOUT,
+                 probe_timeout=SSH_POOL_PROBE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self.probe_timeout = probe_timeout
+        self._lock = threading.Lock()
+        # (ip, login) -> list of (SSHClient, time of last release)
+        self._idle = {}
+        # Incremented by clear(), connections acquired before are closed
+        # instead of returning to the pool
+        self._generation = 0
+
+    @staticmethod
+    def _is_active(client):
+        try:
+            return client._ssh.get_transport().is_active()
+        except Exception:
+            return False
+
+    def _probe(self, client):
+        """Check that the node answers via the connection"""
+        try:
+            transport = client._ssh.get_transport()
+            transport.send_ignore()
+            chan = transport.open_session(timeout=self.probe_timeout)
+            try:
+                chan.settimeout(self.probe_timeout)
+                chan.exec_command('true')
+                return (chan.status_event.wait(self.probe_timeout) and
+                        chan.recv_exit_status() == 0)
+            finally:
+                chan.close()
+        except Exception as e:
+            logger.debug('SSH connection {0} failed the probe: '
+                         '{1}'.format(client, e))
+            return False
+
+    @staticmethod
+    def _close(client):
+        try:
+            client.clear()
+        except Exception:
+            logger.debug('Failed to close SSH connection {0}'.format(client))
+
+    def _evict_idle(self):
+        deadline = time.time() - self.idle_timeout
+        for key, clients in self._idle.items():
+            alive = []
+            for client, last_used in clients:
+                if last_used < deadline:
+                    self._close(client)
+                else:
+                    alive.append((client, last_used))
+            self._idle[key] = alive
+
+    def acquire(self, key, connect):
+        """Return (SSHClient, generation), connect() creates a new client
+        if there is no healthy idle one for the key.
+        """
+        while True:
+            with self._lock:
+                self._evict_idle()
+                generation = self._generation
+                clients = self._idle.get(key, [])
+                if not clients:
+                    break
+                client, _ = clients.pop()
+            # The probe is done out of the lock, it waits for the node
+            if self._probe(client):
+                return client, generation
+            self._close(client)
+        logger.debug('Open new SSH connection to {0}@{1}'.format(
+            key[1], key[0]))
+        return connect(), generation
+
+    def release(self, key, client, generation):
+        with self._lock:
+            if generation == self._generation and self._is_active(client):
+                self._idle.setdefault(key, []).append((client, time.time()))
+                return
+        self._close(client)
+
+    def get(self, ip, login, connect):
+        """Return pooled remote for the node
+
+        :param ip: String, IP address of the node
+        :param login: String, user name
+        :param connect: callable returning a new devops SSHClient
+            :rtype: PooledSSHClient
+        """
+        return PooledSSHClient(self, (ip, login), connect)
+
+    def clear(self):
+        """Close all idle connections, busy ones are closed on release."""
+        with self._lock:
+            self._generation += 1
+            for clients in self._idle.values():
+                for client, _ in clients:
+                    self._close(client)
+            self._idle.clear()
+
+
+class PooledSSHClient(object):
+    """Proxy to SSHClient from the pool.
+
+    Leaving the context or clear() returns the connection to the pool
+    instead of closing it. The proxy takes a connection from the pool
+    again when it is used after that.
+    """
+
+    def __init__(self, pool, key, connect):
+        self._pool = pool
+        self._key = key
+        self._connect = connect
+        self._client = None
+        self._generation = None
+
+    def _get_client(self):
+        if self._client is None:
+            self._client, self._generation = self._pool.acquire(
+                self._key, self._connect)
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self._get_client(), name)
+
+    def __repr__(self):
+        return '<PooledSSHClient {0}@{1}>'.format(self._key[1], self._key[0])
+
+    def __enter__(self):
+        self._get_client()
+        return self
+
+    def __exit__(self, *err):
+        self.clear()
+
+    def clear(self):
+        if self._client is not None:
+            client, self._client = self._client, None
+            self._pool.release(self._key, client, self._generation)
+
+
+ssh_pool = SSHConnectionPool()
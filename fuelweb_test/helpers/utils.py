@@ -12,16 +12,23 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import atexit
+from collections import deque
 import ConfigParser
+import hashlib
 import inspect
 import json
 import time
 import traceback
 import yaml
 import os
+import pipes
 import posixpath
 import re
 import signal
+import tarfile
+import threading
+from multiprocessing.pool import ThreadPool
 
 from proboscis import asserts
 
@@ -83,12 +90,63 @@ def check_if_service_restarted(node_ssh, services_list=None,
                 'Seems service {0} was not restarted {1}'.format(service, res))
 
 
+# Compressors which can use all the CPUs are preferred to gzip,
+# name: (command, archive extension)
+LOGS_COMPRESSORS = (
+    ('pigz', ('pigz', 'tgz')),
+    ('zstd', ('zstd -T0 -q', 'tar.zst')),
+    ('gzip', ('gzip', 'tgz')),
+)
+# Manifest of logs pulled from the environment by this run, see
+# pull_out_logs_via_ssh()
+LOGS_MANIFEST = '/var/tmp/fuel-qa-logs-{0}-{1}-{2}.manifest'.format(
+    re.sub(r'[^\w.-]', '_', settings.ENV_NAME), os.getpid(),
+    int(time.time()))
+
+
+def get_logs_compressor(remote):
+    """Return (command, archive extension) of the best available compressor
+
+    :param remote: SSHClient
+        :rtype: tuple
+    """
+    cmd = ' || '.join('command -v {0}'.format(name)
+                      for name, _ in LOGS_COMPRESSORS)
+    found = ''.join(remote.execute(cmd)['stdout']).strip()
+    compressors = dict(LOGS_COMPRESSORS)
+    return compressors.get(posixpath.basename(found), compressors['gzip'])
+
+
 @logwrap
 def pull_out_logs_via_ssh(admin_remote, name,
-                          logs_dirs=('/var/log/', '/root/', '/etc/fuel/')):
+                          logs_dirs=('/var/log/', '/root/', '/etc/fuel/'),
+                          incremental=settings.PULL_LOGS_INCREMENTAL):
+    """Archive logs on the master node and download the archive
+
+    :param admin_remote: SSHClient to the master node
+    :param name: String, part of the archive name
+    :param logs_dirs: directories to archive
+    :param incremental: Boolean, archive only files which are new or have
+                        other mtime or size than at the previous pull with
+                        incremental=True in this run
+    """
+    def _list_changed_files(_dirs):
+        cmd = ("find {d} -type f -printf '%p\\t%T@\\t%s\\n' 2>/dev/null | "
+               "LC_ALL=C sort > {m}.new; touch {m}; "
+               "LC_ALL=C comm -13 {m} {m}.new | cut -f1 > {m}.list; "
+               "wc -l < {m}.list").format(d=' '.join(_dirs), m=LOGS_MANIFEST)
+        result = admin_remote.execute(cmd)
+        return int(''.join(result['stdout']).strip() or 0)
+
+    def _remove_temp_files():
+        admin_remote.execute('rm -f {0}.new {0}.list'.format(LOGS_MANIFEST))
+
     def _compress_logs(_dirs, _archive_path):
-        cmd = 'tar --absolute-names --warning=no-file-changed -czf {t} {d}'.\
-            format(t=_archive_path, d=' '.join(_dirs))
+        sources = ('-T {0}.list'.format(LOGS_MANIFEST) if incremental
+                   else ' '.join(_dirs))
+        cmd = ('set -o pipefail; tar --absolute-names '
+               '--warning=no-file-changed -cf - {s} | {c} > {t}'.format(
+                   s=sources, c=compressor, t=_archive_path))
         result = admin_remote.execute(cmd)
         if result['exit_code'] != 0:
             logger.error("Compressing of logs on master node failed: {0}".
@@ -96,46 +154,81 @@ def pull_out_logs_via_ssh(admin_remote, name,
             return False
         return True
 
-    archive_path = '/var/tmp/fail_{0}_diagnostic-logs_{1}.tgz'.format(
-        name, time.strftime("%Y_%m_%d__%H_%M_%S", time.gmtime()))
-
     try:
+        compressor, extension = get_logs_compressor(admin_remote)
+        archive_path = '/var/tmp/fail_{0}_diagnostic-logs_{1}{2}.{3}'.format(
+            name, time.strftime("%Y_%m_%d__%H_%M_%S", time.gmtime()),
+            '_incremental' if incremental else '', extension)
+
+        if incremental:
+            changed_files = _list_changed_files(logs_dirs)
+            logger.info("{0} log files changed since the previous pull".
+                        format(changed_files))
+            if not changed_files:
+                _remove_temp_files()
+                return
         if _compress_logs(logs_dirs, archive_path):
             if not admin_remote.download(archive_path, settings.LOGS_DIR):
                 logger.error(("Downloading of archive with logs failed, file"
                               "wasn't saved on local host"))
+            elif incremental:
+                # Files of the failed pull are archived again next time
+                admin_remote.execute('mv -f {0}.new {0}'.format(
+                    LOGS_MANIFEST))
+        if incremental:
+            _remove_temp_files()
     except Exception:
         logger.error(traceback.format_exc())
 
 
+def remove_logs_manifest(admin_remote):
+    """Forget logs pulled by this run, e.g. after a snapshot is reverted,
+    the manifest restored with the snapshot doesn't match the logs
+    """
+    admin_remote.execute('rm -f {0} {0}.new {0}.list'.format(LOGS_MANIFEST))
+
+
 @logwrap
 def store_astute_yaml(env):
     func_name = get_test_method_name()
-    for node in env.d_env.nodes().slaves:
-        nailgun_node = env.fuel_web.get_nailgun_node_by_devops_node(node)
-        if node.driver.node_active(node) and nailgun_node['roles']:
-            try:
-                filename = '{0}/{1}-{2}.yaml'.format(settings.LOGS_DIR,
-                                                     func_name, node.name)
-                logger.info("Storing {0}".format(filename))
-                _ip = env.fuel_web.get_nailgun_node_by_name(node.name)['ip']
-                with env.d_env.get_ssh_to_remote(_ip) as remote:
-                    if not remote.download('/etc/astute.yaml', filename):
-                        logger.error("Downloading 'astute.yaml' from the node "
-                                     "{0} failed.".format(node.name))
-            except Exception:
-                logger.error(traceback.format_exc())
+    slaves = env.d_env.nodes().slaves
+    nailgun_nodes = env.fuel_web.get_nailgun_nodes_by_devops_nodes(slaves)
+    nodes_ips = dict(
+        (node.name, nailgun_node['ip'])
+        for node, nailgun_node in zip(slaves, nailgun_nodes)
+        if node.driver.node_active(node) and nailgun_node['roles'])
+
+    def store(node_name):
+        try:
+            filename = '{0}/{1}-{2}.yaml'.format(settings.LOGS_DIR,
+                                                 func_name, node_name)
+            logger.info("Storing {0}".format(filename))
+            with env.get_ssh_to_remote(nodes_ips[node_name]) as remote:
+                if not remote.download('/etc/astute.yaml', filename):
+                    logger.error("Downloading 'astute.yaml' from the node "
+                                 "{0} failed.".format(node_name))
+        except Exception:
+            logger.error(traceback.format_exc())
+
+    run_concurrently(store, sorted(nodes_ips))
 
 
 @logwrap
 def get_node_packages(remote, func_name, node_role,
                       packages_dict, release=settings.OPENSTACK_RELEASE):
-    if settings.OPENSTACK_RELEASE_UBUNTU in release:
-        cmd = "dpkg-query -W -f='${Package} ${Version}'\r"
-    else:
-        cmd = 'rpm -qa --qf "%{name} %{version}"\r'
+    cmd = get_packages_cmd(release)
     node_packages = remote.execute(cmd)['stdout'][0].split('\r')[:-1]
+    return add_node_packages(packages_dict, func_name, node_role,
+                             node_packages)
 
+
+def get_packages_cmd(release=settings.OPENSTACK_RELEASE):
+    if settings.OPENSTACK_RELEASE_UBUNTU in release:
+        return "dpkg-query -W -f='${Package} ${Version}'\r"
+    return 'rpm -qa --qf "%{name} %{version}"\r'
+
+
+def add_node_packages(packages_dict, func_name, node_role, node_packages):
     logger.debug("node packages are {0}".format(node_packages))
     packages_dict[func_name][node_role] = node_packages\
         if node_role not in packages_dict[func_name].keys()\
@@ -144,26 +237,84 @@ def get_node_packages(remote, func_name, node_role,
     return packages_dict
 
 
+# Append-only store of packages of the cluster nodes, one JSON object per
+# line, see store_packages_json()
+PACKAGES_STORE = '{0}/packages.jsonl'.format(settings.LOGS_DIR)
+# Merge of the store at exit is registered by the first write to it
+_packages_store_merge_registered = False
+
+
 @logwrap
 def store_packages_json(env):
+    """Append packages of the cluster nodes to PACKAGES_STORE, the store
+    is merged to packages.json at exit, see load_packages_store()
+    """
+    global _packages_store_merge_registered
     func_name = "".join(get_test_method_name())
     packages = {func_name: {}}
     cluster_id = env.fuel_web.get_last_created_cluster()
-    for nailgun_node in env.fuel_web.client.list_cluster_nodes(cluster_id):
+    nailgun_nodes = env.fuel_web.client.list_cluster_nodes(cluster_id)
+    results = run_on_nodes(env, nailgun_nodes, get_packages_cmd())
+    for nailgun_node in nailgun_nodes:
         role = '_'.join(nailgun_node['roles'])
         logger.debug('role is {0}'.format(role))
-        with env.d_env.get_ssh_to_remote(nailgun_node['ip']) as remote:
-            packages = get_node_packages(remote, func_name, role, packages)
-    packages_file = '{0}/packages.json'.format(settings.LOGS_DIR)
+        node_packages = \
+            results[nailgun_node['ip']]['stdout'][0].split('\r')[:-1]
+        packages = add_node_packages(packages, func_name, role,
+                                     node_packages)
+    with open(PACKAGES_STORE, 'a') as outfile:
+        outfile.write(json.dumps(packages) + '\n')
+    if not _packages_store_merge_registered:
+        atexit.register(merge_packages_store)
+        _packages_store_merge_registered = True
+
+
+def load_packages_store(packages_file=None):
+    """Return packages stored by store_packages_json()
+
+    Every line of the store is a JSON object {test: {role: packages}},
+    the first record of a test wins as it did in packages.json. Records
+    of packages.json written before are merged too.
+
+    :param packages_file: String, path to packages.json
+        :rtype: dict {test: {role: packages}}
+    """
+    packages_file = packages_file or '{0}/packages.json'.format(
+        settings.LOGS_DIR)
+    packages = {}
     if os.path.isfile(packages_file):
-        with open(packages_file, 'r') as outfile:
+        with open(packages_file, 'r') as infile:
             try:
-                file_packages = json.load(outfile)
-            except:
-                file_packages = {}
-        packages.update(file_packages)
-    with open(packages_file, 'w') as outfile:
-        json.dump(packages, outfile)
+                packages.update(json.load(infile))
+            except ValueError:
+                logger.error("Can't load {0}".format(packages_file))
+    if os.path.isfile(PACKAGES_STORE):
+        with open(PACKAGES_STORE, 'r') as infile:
+            for line in infile:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # The line may be cut if the process was killed
+                    logger.error("Can't load record of {0}: {1}".format(
+                        PACKAGES_STORE, line))
+                    continue
+                for test, roles in record.items():
+                    packages.setdefault(test, roles)
+    return packages
+
+
+def merge_packages_store():
+    """Merge PACKAGES_STORE to packages.json and remove the store"""
+    if not os.path.isfile(PACKAGES_STORE):
+        return
+    packages_file = '{0}/packages.json'.format(settings.LOGS_DIR)
+    try:
+        packages = load_packages_store(packages_file)
+        with open(packages_file, 'w') as outfile:
+            json.dump(packages, outfile)
+        os.remove(PACKAGES_STORE)
+    except Exception:
+        logger.error(traceback.format_exc())
 
 
 @logwrap
@@ -233,6 +384,10 @@ def update_yaml(yaml_tree=None, yaml_value='', is_uniq=True,
         yaml.dump(yaml_data, f, default_flow_style=False)
 
 
+class TimeStatError(Exception):
+    """Time statistic can't be stored"""
+
+
 class TimeStat(object):
     """ Context manager for measuring the execution time of the code.
     Usage:
@@ -273,14 +428,49 @@ class TimeStat(object):
         except Exception:
             logger.error("Error storing time statistic for {0}"
                          " {1}".format(yaml_path, traceback.format_exc()))
-            if not MASTER_IS_CENTOS7:
-                raise
+            # Don't hide an error raised by the measured code
+            if not MASTER_IS_CENTOS7 and exc_type is None:
+                raise TimeStatError(
+                    "Error storing time statistic for {0}".format(yaml_path))
 
     @property
     def spent_time(self):
         return time.time() - self.begin_time
 
 
+def run_concurrently(func, items, concurrency=settings.CONCURRENCY):
+    """Call func for each item in a bounded pool of threads
+    :param func: callable which accepts one item
+    :param items: list of hashable items, e.g. node IDs
+    :param concurrency: max number of simultaneous calls
+    :return: tuple of dicts (results, errors) keyed by items, errors
+             contain exceptions raised by the calls
+    """
+    results = {}
+    errors = {}
+
+    def call(item):
+        try:
+            results[item] = func(item)
+        except Exception as e:
+            logger.debug('Call of {0} for {1} failed: {2}'.format(
+                func, item, traceback.format_exc()))
+            errors[item] = e
+
+    items = list(items)
+    if len(items) < 2 or concurrency < 2:
+        for item in items:
+            call(item)
+        return results, errors
+    pool = ThreadPool(min(concurrency, len(items)))
+    try:
+        pool.map(call, items)
+    finally:
+        pool.close()
+        pool.join()
+    return results, errors
+
+
 def install_pkg(remote, pkg_name):
     """Install a package <pkg_name> on node
     :param remote: SSHClient to remote node
@@ -300,8 +490,41 @@ def install_pkg(remote, pkg_name):
     return remote_status['exit_code']
 
 
-def cond_upload(remote, source, target, condition=''):
-    # Upload files only if condition in regexp matches filenames
+def drain_lines(stream, max_lines=100):
+    """Read the stream in a separate thread, so a remote command can't get
+    stuck on its full buffer while nobody reads it
+
+    :param stream: file-like object, e.g. stderr of a channel
+    :param max_lines: number of the last lines to keep
+    :return: tuple (thread, deque of the last lines), join the thread
+             before reading the lines
+    """
+    tail = deque(maxlen=max_lines)
+
+    def _drain():
+        for line in stream:
+            tail.append(line)
+
+    drainer = threading.Thread(target=_drain)
+    drainer.daemon = True
+    drainer.start()
+    return drainer, tail
+
+
+def cond_upload(remote, source, target, condition='', checksums=False):
+    """Upload files only if condition in regexp matches filenames
+
+    Directories are packed into one tar stream which is extracted on the
+    remote by one command.
+
+    :param remote: SSHClient
+    :param source: local file or directory
+    :param target: remote file or directory
+    :param condition: regexp for local paths of files to upload
+    :param checksums: Boolean, skip files which already exist on the remote
+                      with the same md5 sum
+    :return: number of uploaded files
+    """
     if remote.isdir(target):
         target = posixpath.join(target, os.path.basename(source))
 
@@ -317,29 +540,83 @@ def cond_upload(remote, source, target, condition=''):
                          "uploading skipped".format(condition, source))
             return 0
 
+    remote_md5sums = get_remote_md5sums(remote, target) if checksums else {}
+
+    def as_root(tarinfo):
+        tarinfo.uid = tarinfo.gid = 0
+        tarinfo.uname = tarinfo.gname = 'root'
+        return tarinfo
+
     files_count = 0
-    for rootdir, subdirs, files in os.walk(source):
-        targetdir = os.path.normpath(
-            os.path.join(
-                target,
-                os.path.relpath(rootdir, source))).replace("\\", "/")
-
-        remote.mkdir(targetdir)
-
-        for entry in files:
-            local_path = os.path.join(rootdir, entry)
-            remote_path = posixpath.join(targetdir, entry)
-            if re.match(condition, local_path):
-                remote.upload(local_path, remote_path)
+    skipped_count = 0
+    cmd = 'mkdir -p {0} && tar -xf - -C {0}'.format(pipes.quote(target))
+    chan, stdin, stderr, _ = remote.execute_async(cmd)
+    # Warnings of tar must not block the upload
+    drainer, stderr_tail = drain_lines(stderr)
+    try:
+        tar = tarfile.open(fileobj=stdin, mode='w|', dereference=True)
+        for rootdir, subdirs, files in os.walk(source):
+            arcdir = os.path.relpath(rootdir, source).replace("\\", "/")
+            tar.add(rootdir, arcname=arcdir, recursive=False,
+                    filter=as_root)
+
+            for entry in files:
+                local_path = os.path.join(rootdir, entry)
+                arcname = posixpath.normpath(posixpath.join(arcdir, entry))
+                if not re.match(condition, local_path):
+                    logger.debug("Pattern '{0}' doesn't match the file "
+                                 "'{1}', uploading skipped"
+                                 .format(condition, local_path))
+                    continue
+                if arcname in remote_md5sums and \
+                        remote_md5sums[arcname] == md5sum(local_path):
+                    skipped_count += 1
+                    continue
+                tar.add(local_path, arcname=arcname, filter=as_root)
                 files_count += 1
-                logger.debug("File '{0}' uploaded to the remote folder '{1}'"
-                             .format(source, target))
-            else:
-                logger.debug("Pattern '{0}' doesn't match the file '{1}', "
-                             "uploading skipped".format(condition, local_path))
+        tar.close()
+        stdin.close()
+        chan.shutdown_write()
+        exit_code = chan.recv_exit_status()
+        drainer.join()
+        asserts.assert_equal(
+            exit_code, 0,
+            "Extracting of files uploaded from '{0}' to the remote folder "
+            "'{1}' failed: {2}".format(source, target,
+                                       ''.join(stderr_tail)))
+    finally:
+        chan.close()
+    logger.debug("{0} files from '{1}' uploaded to the remote folder '{2}', "
+                 "{3} files are not changed".format(files_count, source,
+                                                    target, skipped_count))
     return files_count
 
 
+def md5sum(path):
+    md5 = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def get_remote_md5sums(remote, path):
+    """Return md5 sums of all the files in the remote directory
+
+    :param remote: SSHClient
+    :param path: remote directory
+    :return: dict {path relative to the directory: md5 sum}
+    """
+    # 'cd' returns 1 if the directory doesn't exist yet
+    cmd = ('cd {0} && find . -type f -print0 | xargs -0 -r md5sum'
+           .format(pipes.quote(path)))
+    md5sums = {}
+    for line in run_on_remote_iter(remote, cmd, assert_ec_equal=[0, 1]):
+        md5, _, file_path = line.rstrip('\n').partition('  ')
+        md5sums[posixpath.normpath(file_path)] = md5
+    return md5sums
+
+
 def run_on_remote(*args, **kwargs):
     if 'jsonify' in kwargs:
         if kwargs['jsonify']:
@@ -348,25 +625,20 @@ def run_on_remote(*args, **kwargs):
         return run_on_remote_get_results(*args, **kwargs)['stdout']
 
 
-@logwrap
-def run_on_remote_get_results(remote, cmd, clear=False, err_msg=None,
-                              jsonify=False, assert_ec_equal=None,
-                              raise_on_assert=True):
-    # TODO(ivankliuk): move it to devops.helpers.SSHClient
-    """Execute ``cmd`` on ``remote`` and return result.
-
-    :param remote: devops.helpers.helpers.SSHClient
-    :param cmd: command to execute on remote host
-    :param clear: clear SSH session
-    :param err_msg: custom error message
-    :param assert_ec_equal: list of expected exit_code
-    :param raise_on_assert: Boolean
-    :return: dict
-    :raise: Exception
+class RemoteResult(dict):
+    """Result of command execution, 'stdout_str' and 'stderr_str' are
+    joined from the lists of lines only when they are requested.
     """
-    if assert_ec_equal is None:
-        assert_ec_equal = [0]
-    result = remote.execute(cmd)
+
+    def __missing__(self, key):
+        if key in ('stdout_str', 'stderr_str'):
+            self[key] = ''.join(self[key[:-len('_str')]])
+            return self[key]
+        raise KeyError(key)
+
+
+def _check_exit_code(remote, cmd, result, err_msg, assert_ec_equal,
+                     raise_on_assert):
     if result['exit_code'] not in assert_ec_equal:
         error_details = {
             'command': cmd,
@@ -386,12 +658,36 @@ def run_on_remote_get_results(remote, cmd, clear=False, err_msg=None,
         if raise_on_assert:
             raise Exception(log_msg)
 
+
+@logwrap
+def run_on_remote_get_results(remote, cmd, clear=False, err_msg=None,
+                              jsonify=False, assert_ec_equal=None,
+                              raise_on_assert=True):
+    # TODO(ivankliuk): move it to devops.helpers.SSHClient
+    """Execute ``cmd`` on ``remote`` and return result.
+
+    Use run_on_remote_iter() for commands with big output which can be
+    processed line by line.
+
+    :param remote: devops.helpers.helpers.SSHClient
+    :param cmd: command to execute on remote host
+    :param clear: clear SSH session
+    :param err_msg: custom error message
+    :param assert_ec_equal: list of expected exit_code
+    :param raise_on_assert: Boolean
+    :return: RemoteResult
+    :raise: Exception
+    """
+    if assert_ec_equal is None:
+        assert_ec_equal = [0]
+    result = RemoteResult(remote.execute(cmd))
+    _check_exit_code(remote, cmd, result, err_msg, assert_ec_equal,
+                     raise_on_assert)
+
     if clear:
         remote.clear()
 
-    result['stdout_str'] = ''.join(result['stdout'])
     result['stdout_len'] = len(result['stdout'])
-    result['stderr_str'] = ''.join(result['stderr'])
     result['stderr_len'] = len(result['stderr'])
 
     if jsonify:
@@ -407,6 +703,133 @@ def run_on_remote_get_results(remote, cmd, clear=False, err_msg=None,
     return result
 
 
+def run_on_remote_iter(remote, cmd, err_msg=None, jsonify=False,
+                       assert_ec_equal=None, raise_on_assert=True):
+    """Execute ``cmd`` on ``remote`` and yield lines of stdout as they
+    arrive, without keeping the whole output in memory.
+
+    The exit code is checked after all the lines are read, so the error
+    is raised by the last iteration. stderr is read by a separate thread
+    at the same time, so the command can't get stuck on a full stderr
+    buffer, and only its last lines are kept for the error message.
+
+    :param remote: devops.helpers.helpers.SSHClient
+    :param cmd: command to execute on remote host
+    :param err_msg: custom error message
+    :param jsonify: Boolean, yield every line deserialized from JSON
+    :param assert_ec_equal: list of expected exit_code
+    :param raise_on_assert: Boolean
+    :return: generator of lines (strings or deserialized objects)
+    :raise: Exception
+    """
+    if assert_ec_equal is None:
+        assert_ec_equal = [0]
+    logger.debug("Executing command: '{0}' on host {1}".format(
+        cmd, remote.host))
+    chan, _, stderr, stdout = remote.execute_async(cmd)
+    drainer, stderr_tail = drain_lines(stderr)
+    try:
+        for line in stdout:
+            if not jsonify:
+                yield line
+            elif line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    error_msg = (
+                        "Unable to deserialize line of output of command"
+                        " '{0}' on host {1}: {2}".format(cmd, remote.host,
+                                                         line))
+                    logger.error(error_msg)
+                    raise Exception(error_msg)
+        exit_code = chan.recv_exit_status()
+        drainer.join()
+        if exit_code not in assert_ec_equal:
+            result = {'exit_code': exit_code,
+                      'stdout': ['<streamed>'],
+                      'stderr': list(stderr_tail)}
+            _check_exit_code(remote, cmd, result, err_msg, assert_ec_equal,
+                             raise_on_assert)
+    finally:
+        chan.close()
+
+
+@logwrap
+def run_on_nodes(env, nodes, cmd, concurrency=settings.CONCURRENCY,
+                 err_msg=None, jsonify=False, assert_ec_equal=None,
+                 raise_on_assert=True):
+    """Execute ``cmd`` on the nodes at the same time and return results.
+
+    :param env: EnvironmentModel
+    :param nodes: list of nailgun nodes
+    :param cmd: command or list of commands, commands from the list are
+                executed one by one on every node until one of them fails
+    :param concurrency: max number of nodes running the command at once
+    :param err_msg: custom error message
+    :param jsonify: Boolean, deserialize stdout of the last command
+    :param assert_ec_equal: list of expected exit_code
+    :param raise_on_assert: Boolean, raise one error listing all the nodes
+                            where the command failed
+    :return: dict {node IP: result of the last executed command (see
+             run_on_remote_get_results) with 'command', 'duration' in
+             seconds and 'error' (exception raised on the node or None)}
+    :raise: Exception
+    """
+    if assert_ec_equal is None:
+        assert_ec_equal = [0]
+    cmds = [cmd] if isinstance(cmd, basestring) else list(cmd)
+    hosts = dict((node['ip'], node.get('hostname', node['ip']))
+                 for node in nodes)
+    durations = {}
+
+    def _run(ip):
+        start = time.time()
+        try:
+            with env.get_ssh_to_remote(ip) as remote:
+                for command in cmds:
+                    result = run_on_remote_get_results(
+                        remote, command, jsonify=jsonify,
+                        assert_ec_equal=assert_ec_equal,
+                        raise_on_assert=False)
+                    result['command'] = command
+                    if result['exit_code'] not in assert_ec_equal:
+                        break
+            return result
+        finally:
+            durations[ip] = round(time.time() - start, 1)
+
+    results, errors = run_concurrently(_run, hosts, concurrency=concurrency)
+    for ip, error in errors.items():
+        results[ip] = {'command': None, 'exit_code': None,
+                       'stdout': [], 'stderr': [str(error)],
+                       'stdout_str': '', 'stderr_str': str(error)}
+    for ip, result in results.items():
+        result['duration'] = durations.get(ip, 0)
+        result['error'] = errors.get(ip)
+
+    failed = sorted(ip for ip, result in results.items()
+                    if result['error'] is not None or
+                    result['exit_code'] not in assert_ec_equal)
+    logger.debug('{0!r} finished on {1} nodes, failed on {2}'.format(
+        cmd, len(results), [hosts[ip] for ip in failed]))
+    if failed and raise_on_assert:
+        error_msg = (err_msg or "Command failed on {0} of {1} nodes, "
+                                "expected exit_code {2}."
+                     .format(len(failed), len(results),
+                             ' '.join(map(str, assert_ec_equal))))
+        details = '\n'.join(
+            "{0} ({1}): {2}".format(
+                hosts[ip], ip, results[ip]['error'] or
+                "'{0}' exit_code {1}: {2}".format(
+                    results[ip]['command'], results[ip]['exit_code'],
+                    results[ip]['stderr_str']))
+            for ip in failed)
+        log_msg = '{0}\n{1}'.format(error_msg, details)
+        logger.error(log_msg)
+        raise Exception(log_msg)
+    return results
+
+
 def json_deserialize(json_string):
     """
     Deserialize json_string and return object
@@ -451,57 +874,80 @@ def get_network_template(template_name):
             return yaml.load(template_file)
 
 
+# Collects everything get_net_settings() needs in one execution on a node,
+# the script must stay compatible with python 2.6 and free of single quotes
+NET_SETTINGS_SCRIPT = """
+import glob, json, os, subprocess
+def read(path):
+    try:
+        return open(path).read()
+    except IOError:
+        return ""
+net = "/sys/class/net/"
+data = {"interfaces": [], "vlans": [], "bonds": [], "bridges": [],
+        "ips": {}, "bond_modes": {}, "bond_slaves": {}, "bridge_slaves": {}}
+for line in read("/proc/net/dev").splitlines():
+    fields = line.split()
+    if fields and ":" in fields[0]:
+        data["interfaces"].append(fields[0].split(":")[0])
+for line in read("/proc/net/vlan/config").splitlines():
+    if line.split() and "." in line.split()[0]:
+        data["vlans"].append(line.split()[0])
+data["bonds"] = read(net + "bonding_masters").split()
+data["bridges"] = [p.split("/")[4] for p in glob.glob(net + "*/bridge/")]
+ip = subprocess.Popen(["ip", "-o", "-4", "addr", "show"],
+                      stdout=subprocess.PIPE).communicate()[0]
+for line in ip.splitlines():
+    fields = line.split()
+    data["ips"].setdefault(fields[1], []).append(fields[3])
+for bond in data["bonds"]:
+    data["bond_modes"][bond] = " ".join(
+        read(net + bond + "/bonding/mode").split()[:1])
+    data["bond_slaves"][bond] = read(net + bond + "/bonding/slaves").split()
+for bridge in data["bridges"]:
+    data["bridge_slaves"][bridge] = os.listdir(net + bridge + "/brif/")
+print(json.dumps(data))
+"""
+
+
 @logwrap
 def get_net_settings(remote, skip_interfaces=set()):
+    """Return settings of network interfaces of the node
+
+    All the data is collected by one execution of NET_SETTINGS_SCRIPT.
+
+    :param remote: SSHClient to node
+    :param skip_interfaces: set of regexps of interface names to skip
+        :rtype: dict {interface: {'type', 'ip_addresses', 'bond_mode',
+                'bond_slaves', 'bridge_slaves'}}
+    """
+    def skipped(interface):
+        return any(re.search(regex, interface) for regex in skip_interfaces)
+
+    cmd = "python -c '{0}'".format(NET_SETTINGS_SCRIPT)
+    data = run_on_remote(remote, cmd, jsonify=True)
+
     net_settings = dict()
-    interface_cmd = ('awk \'$1~/:/{split($1,iface,":"); print iface[1]}\''
-                     ' /proc/net/dev')
-    vlan_cmd = 'awk \'$1~/\./{print $1}\' /proc/net/vlan/config'
-    bond_cmd = ('awk \'{gsub(" ","\\n"); print}\' '
-                '/sys/class/net/bonding_masters')
-    bridge_cmd = 'ls -d1 /sys/class/net/*/bridge/ | cut -d/ -f5'
-    ip_cmd = 'ip -o -4 addr show dev {0} | awk \'{{print $4}}\''
-    bond_mode_cmd = 'awk \'{{print $1}}\' /sys/class/net/{0}/bonding/mode'
-    bond_slaves_cmd = ('awk \'{{gsub(" ","\\n"); print}}\' '
-                       '/sys/class/net/{0}/bonding/slaves')
-    bridge_slaves_cmd = 'ls -1 /sys/class/net/{0}/brif/'
-
-    node_interfaces = [l.strip() for l in run_on_remote(remote, interface_cmd)
-                       if not any(re.search(regex, l.strip()) for regex
-                                  in skip_interfaces)]
-    node_vlans = [l.strip() for l in run_on_remote(remote, vlan_cmd)]
-    node_bonds = [l.strip() for l in run_on_remote(remote, bond_cmd)]
-    node_bridges = [l.strip() for l in run_on_remote(remote, bridge_cmd)]
-
-    for interface in node_interfaces:
+    for interface in data['interfaces']:
+        if skipped(interface):
+            continue
         bond_mode = None
         bond_slaves = None
         bridge_slaves = None
-        if interface in node_vlans:
+        if interface in data['vlans']:
             if_type = 'vlan'
-        elif interface in node_bonds:
+        elif interface in data['bonds']:
             if_type = 'bond'
-            bond_mode = ''.join(
-                [l.strip() for l in
-                 run_on_remote(remote, bond_mode_cmd.format(interface))])
-            bond_slaves = set(
-                [l.strip() for l in
-                 run_on_remote(remote, bond_slaves_cmd.format(interface))]
-            )
-        elif interface in node_bridges:
+            bond_mode = data['bond_modes'][interface]
+            bond_slaves = set(data['bond_slaves'][interface])
+        elif interface in data['bridges']:
             if_type = 'bridge'
             bridge_slaves = set(
-                [l.strip() for l in
-                 run_on_remote(remote, bridge_slaves_cmd.format(interface))
-                 if not any(re.search(regex, l.strip())
-                            for regex in skip_interfaces)]
-            )
+                [slave for slave in data['bridge_slaves'][interface]
+                 if not skipped(slave)])
         else:
             if_type = 'common'
-        if_ips = set(
-            [l.strip()
-             for l in run_on_remote(remote, ip_cmd.format(interface))]
-        )
+        if_ips = set(data['ips'].get(interface, []))
 
         net_settings[interface] = {
             'type': if_type,
@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from contextlib import contextmanager
 import re
 import time
 from devops.error import TimeoutError
@@ -37,8 +38,14 @@ from fuelweb_test.helpers.fuel_actions import NailgunActions
 from fuelweb_test.helpers.fuel_actions import PostgresActions
 from fuelweb_test.helpers.fuel_actions import NessusActions
 from fuelweb_test.helpers.ntp import GroupNtpSync
+from fuelweb_test.helpers.polling import wait_adaptive
+from fuelweb_test.helpers.polling import wait_nodes_ready
+from fuelweb_test.helpers.ssh_pool import ssh_pool
+from fuelweb_test.helpers.utils import remove_logs_manifest
+from fuelweb_test.helpers.utils import run_concurrently
 from fuelweb_test.helpers.utils import run_on_remote
 from fuelweb_test.helpers.utils import TimeStat
+from fuelweb_test.helpers.utils import TimeStatError
 from fuelweb_test.helpers import multiple_networks_hacks
 from fuelweb_test.models.fuel_web_client import FuelWebClient
 from fuelweb_test.models.collector_client import CollectorClient
@@ -47,6 +54,26 @@ from fuelweb_test.settings import MASTER_IS_CENTOS7
 from fuelweb_test import logwrap
 from fuelweb_test import logger
 
+# State of libvirt domain, see virDomainState
+VIR_DOMAIN_PAUSED = 3
+
+
+@contextmanager
+def probe_time(name):
+    """Store time of a probe done while the environment is reverted, it's
+    collected only in FAST_REVERT mode. Failure to store the time doesn't
+    break the revert.
+    """
+    if not settings.FAST_REVERT:
+        yield
+        return
+    try:
+        with TimeStat(name, is_uniq=False):
+            yield
+    except TimeStatError:
+        # The error is already logged by TimeStat
+        pass
+
 
 class EnvironmentModel(object):
     """EnvironmentModel."""  # TODO documentation
@@ -111,6 +138,19 @@ class EnvironmentModel(object):
     def admin_node_ip(self):
         return self.fuel_web.admin_node_ip
 
+    def get_ssh_to_remote(self, ip,
+                          login=settings.SSH_CREDENTIALS['login'],
+                          password=settings.SSH_CREDENTIALS['password']):
+        """Return SSH connection to the node from the pool of connections
+
+        :param ip: String, IP address of the node
+            :rtype: PooledSSHClient
+        """
+        return ssh_pool.get(
+            ip, login,
+            lambda: self.d_env.get_ssh_to_remote(ip, login=login,
+                                                 password=password))
+
     @property
     def collector(self):
         return CollectorClient(settings.ANALYTICS_IP, 'api/v1/json')
@@ -127,26 +167,49 @@ class EnvironmentModel(object):
         """
         # self.dhcrelay_check()
 
-        for node in devops_nodes:
-            logger.info("Bootstrapping node: {}".format(node.name))
-            node.start()
-            # TODO(aglarendil): LP#1317213 temporary sleep
-            # remove after better fix is applied
-            time.sleep(5)
+        self.start_nodes(devops_nodes)
+
+        registered = []
+
+        def _all_registered():
+            registered[:] = self.nailgun_nodes(devops_nodes)
+            logger.debug('{0} of {1} nodes are registered'.format(
+                len(filter(None, registered)), len(devops_nodes)))
+            return all(registered)
 
         if not MASTER_IS_CENTOS7:
             with TimeStat("wait_for_nodes_to_start_and_register_in_nailgun"):
-                wait(
-                    lambda: all(self.nailgun_nodes(devops_nodes)),
-                    15,
-                    timeout)
+                wait_adaptive(_all_registered, interval=15, timeout=timeout)
         else:
-            wait(lambda: all(self.nailgun_nodes(devops_nodes)), 15, timeout)
+            wait_adaptive(_all_registered, interval=15, timeout=timeout)
 
         if not skip_timesync:
-            self.sync_time([node for node in self.nailgun_nodes(devops_nodes)])
+            self.sync_time(registered)
+
+        return registered
+
+    @logwrap
+    def start_nodes(self, devops_nodes,
+                    concurrency=settings.BOOTSTRAP_CONCURRENCY,
+                    ramp_interval=settings.BOOTSTRAP_RAMP_INTERVAL):
+        """Start vms by groups of [concurrency] nodes with a pause of
+        [ramp_interval] seconds after every group.
+        """
+        def _start(node):
+            logger.info("Bootstrapping node: {}".format(node.name))
+            node.start()
 
-        return self.nailgun_nodes(devops_nodes)
+        devops_nodes = list(devops_nodes)
+        concurrency = max(concurrency, 1)
+        for i in range(0, len(devops_nodes), concurrency):
+            _, errors = run_concurrently(
+                _start, devops_nodes[i:i + concurrency],
+                concurrency=concurrency)
+            if errors:
+                raise errors.values()[0]
+            # TODO(aglarendil): LP#1317213 temporary sleep
+            # remove after better fix is applied
+            time.sleep(ramp_interval)
 
     @logwrap
     def get_admin_node_ip(self):
@@ -272,6 +335,7 @@ class EnvironmentModel(object):
                     self._virt_env = Environment.describe_environment(
                         boot_from=settings.ADMIN_BOOT_DEVICE)
                     self._virt_env.define()
+                    self._devops_nodes_changed()
             else:
                 try:
                     return Environment.get(name=self._config[
@@ -280,20 +344,42 @@ class EnvironmentModel(object):
                     self._virt_env = Environment.create_environment(
                         full_config=self._config)
                     self._virt_env.define()
+                    self._devops_nodes_changed()
         return self._virt_env
 
+    def _devops_nodes_changed(self):
+        if self._fuel_web is not None:
+            self._fuel_web.devops_nodes_index.invalidate()
+
+    def _reset_api_caches(self):
+        """Drop Nailgun responses and nodes cached before the environment
+        was reverted or resumed, they are outdated
+        """
+        if self._fuel_web is not None:
+            if self._fuel_web.client.cache is not None:
+                self._fuel_web.client.cache.invalidate()
+            self._fuel_web.nodes_registry.invalidate()
+
     def resume_environment(self):
         self.d_env.resume()
+        self._reset_api_caches()
         admin = self.d_env.nodes().admin
 
         try:
-            admin.await(self.d_env.admin_net, timeout=30, by_port=8000)
+            with probe_time('probe_admin_port'):
+                admin.await(self.d_env.admin_net, timeout=30, by_port=8000)
         except Exception as e:
             logger.warning("From first time admin isn't reverted: "
                            "{0}".format(e))
             admin.destroy()
-            logger.info('Admin node was destroyed. Wait 10 sec.')
-            time.sleep(10)
+            if settings.FAST_REVERT:
+                logger.info('Admin node was destroyed. Wait for it to stop.')
+                with probe_time('probe_admin_stopped'):
+                    wait_adaptive(lambda: not admin.driver.node_active(admin),
+                                  timeout=60)
+            else:
+                logger.info('Admin node was destroyed. Wait 10 sec.')
+                time.sleep(10)
 
             admin.start()
             logger.info('Admin node started second time.')
@@ -319,7 +405,10 @@ class EnvironmentModel(object):
     def make_snapshot(self, snapshot_name, description="", is_make=False):
         if settings.MAKE_SNAPSHOT or is_make:
             self.d_env.suspend(verbose=False)
-            time.sleep(10)
+            if settings.FAST_REVERT:
+                self.wait_nodes_paused()
+            else:
+                time.sleep(10)
 
             self.d_env.snapshot(snapshot_name, force=True,
                                 description=description)
@@ -328,28 +417,94 @@ class EnvironmentModel(object):
         if settings.FUEL_STATS_CHECK:
             self.resume_environment()
 
+    def wait_nodes_paused(self, timeout=60):
+        """Wait until libvirt domains of all running nodes are paused.
+
+        libvirt pauses a domain before suspend() returns, so usually the
+        first check passes, but the snapshot must never be taken from
+        a domain which is still running.
+        """
+        def _paused(node):
+            domain = node.driver.conn.lookupByUUIDString(node.uuid)
+            return domain.state()[0] == VIR_DOMAIN_PAUSED
+
+        nodes = [node for node in self.d_env.get_nodes()
+                 if node.driver.node_active(node)]
+        try:
+            with probe_time('probe_nodes_paused'):
+                wait_adaptive(lambda: all(_paused(node) for node in nodes),
+                              timeout=timeout)
+        except TimeoutError:
+            raise TimeoutError('Nodes are not paused after {0} seconds: '
+                               '{1}'.format(timeout,
+                                            [node.name for node in nodes
+                                             if not _paused(node)]))
+
     def nailgun_nodes(self, devops_nodes):
-        return map(
-            lambda node: self.fuel_web.get_nailgun_node_by_devops_node(node),
-            devops_nodes
-        )
+        return self.fuel_web.get_nailgun_nodes_by_devops_nodes(devops_nodes)
 
     def check_slaves_are_ready(self):
         devops_nodes = [node for node in self.d_env.nodes().slaves
                         if node.driver.node_active(node)]
-        # Bug: 1455753
-        time.sleep(30)
+        if settings.FAST_REVERT:
+            with probe_time('probe_slaves_ssh'):
+                self.wait_slaves_ssh(devops_nodes)
+            # Bug: 1455753. Right after the revert nailgun has 'online'
+            # state of the nodes from the snapshot, so wait for agent
+            # reports which are newer than the revert
+            with probe_time('probe_slaves_report'):
+                self.wait_slaves_report(devops_nodes)
+        else:
+            # Bug: 1455753
+            time.sleep(30)
 
-        for node in devops_nodes:
+        def _wait_online(node, timeout):
             try:
-                wait(lambda:
-                     self.fuel_web.get_nailgun_node_by_devops_node(
-                         node)['online'], timeout=60 * 6)
+                wait_adaptive(lambda:
+                              self.fuel_web.get_nailgun_node_by_devops_node(
+                                  node)['online'], timeout=timeout)
             except TimeoutError:
                     raise TimeoutError(
                         "Node {0} does not become online".format(node.name))
+
+        with probe_time('probe_slaves_online'):
+            wait_nodes_ready(_wait_online, devops_nodes, 60 * 6,
+                             name='Slaves online state')
         return True
 
+    def wait_slaves_ssh(self, devops_nodes, timeout=60 * 6):
+        """Wait until SSH port of the slaves accepts connections"""
+        def _wait_ssh(node, _timeout):
+            ip = self.fuel_web.get_nailgun_node_by_devops_node(node)['ip']
+            wait_adaptive(lambda: _tcp_ping(ip, 22), timeout=_timeout,
+                          timeout_msg='SSH on node {0} ({1}) is not '
+                                      'reachable'.format(node.name, ip))
+
+        wait_nodes_ready(_wait_ssh, devops_nodes, timeout,
+                         name='Slaves SSH')
+
+    def wait_slaves_report(self, devops_nodes, timeout=60 * 6):
+        """Wait until nailgun gets reports of agents of the slaves which
+        are newer than the moment of the call. Time of the last report is
+        not shown by API, so it's taken from nailgun DB.
+        """
+        node_ids = [str(node['id'])
+                    for node in self.nailgun_nodes(devops_nodes)]
+        if not node_ids:
+            return
+        postgres = self.postgres_actions
+        since = postgres.run_query(
+            'nailgun', 'select extract(epoch from localtimestamp)')
+        query = ('select count(id) from nodes where id in ({0}) and '
+                 'extract(epoch from timestamp) > {1}'.format(
+                     ', '.join(node_ids), since))
+        wait_adaptive(
+            lambda: int(postgres.run_query('nailgun', query)) ==
+            len(node_ids),
+            timeout=timeout,
+            timeout_msg='Nailgun has not got reports from agents of the '
+                        'slaves {0}'.format([n.name for n in devops_nodes]))
+
     def revert_snapshot(self, name, skip_timesync=False):
         if not self.d_env.has_snapshot(name):
             return False
@@ -358,9 +513,15 @@ class EnvironmentModel(object):
 
         logger.info("Reverting the snapshot '{0}' ....".format(name))
         self.d_env.revert(name)
+        # Pooled SSH connections were opened to the nodes before the revert
+        ssh_pool.clear()
+        self._reset_api_caches()
 
         logger.info("Resuming the snapshot '{0}' ....".format(name))
         self.resume_environment()
+        if settings.PULL_LOGS_INCREMENTAL:
+            with self.d_env.get_admin_remote() as remote:
+                remove_logs_manifest(remote)
 
         if not skip_timesync:
             nailgun_nodes = [self.fuel_web.get_nailgun_node_by_name(node.name)
@@ -369,8 +530,11 @@ class EnvironmentModel(object):
             self.sync_time(nailgun_nodes)
 
         try:
-            _wait(self.fuel_web.client.get_releases,
-                  expected=EnvironmentError, timeout=300)
+            with probe_time('probe_nailgun_api'):
+                # Not cached request, so the answer comes from Nailgun
+                _wait(lambda: self.fuel_web.client.client.get(
+                      '/api/releases/'),
+                      expected=EnvironmentError, timeout=300)
         except exceptions.Unauthorized:
             self.set_admin_keystone_password()
             self.fuel_web.get_nailgun_version()
@@ -401,7 +565,7 @@ class EnvironmentModel(object):
 
     def set_admin_keystone_password(self):
         try:
-            self.fuel_web.client.get_releases()
+            self.fuel_web.client.client.get('/api/releases/')
         # TODO(akostrikov) CENTOS7 except exceptions.Unauthorized:
         except:
             with self.d_env.get_admin_remote() as remote:
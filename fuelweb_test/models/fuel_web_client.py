@@ -14,7 +14,6 @@
 
 import re
 import time
-import traceback
 import ipaddr
 from netaddr import EUI
 from urllib2 import HTTPError
@@ -44,8 +43,16 @@ from fuelweb_test.helpers.decorators import duration
 from fuelweb_test.helpers.decorators import retry
 from fuelweb_test.helpers.decorators import update_fuel
 from fuelweb_test.helpers.decorators import upload_manifests
+from fuelweb_test.helpers.nodes_registry import DevopsNodesIndex
+from fuelweb_test.helpers.nodes_registry import NailgunNodesRegistry
+from fuelweb_test.helpers.polling import ProgressStalledError
+from fuelweb_test.helpers.polling import ProgressTracker
+from fuelweb_test.helpers.polling import wait_adaptive
+from fuelweb_test.helpers.polling import wait_nodes_ready
 from fuelweb_test.helpers import replace_repos
 from fuelweb_test.helpers.security import SecurityChecks
+from fuelweb_test.helpers.ssh_pool import ssh_pool
+from fuelweb_test.helpers.utils import run_concurrently
 from fuelweb_test.helpers.utils import run_on_remote
 from fuelweb_test.helpers.utils import node_freemem
 from fuelweb_test.helpers.utils import get_node_hiera_roles
@@ -56,7 +63,6 @@ from fuelweb_test.models.nailgun_client import NailgunClient
 from fuelweb_test import ostf_test_mapping as map_ostf
 from fuelweb_test import QuietLogger
 import fuelweb_test.settings as help_data
-from fuelweb_test.settings import ATTEMPTS
 from fuelweb_test.settings import BONDING
 from fuelweb_test.settings import DEPLOYMENT_MODE_HA
 from fuelweb_test.settings import DISABLE_SSL
@@ -69,11 +75,12 @@ from fuelweb_test.settings import NEUTRON_SEGMENT_TYPE
 from fuelweb_test.settings import NODEGROUPS
 from fuelweb_test.settings import OPENSTACK_RELEASE
 from fuelweb_test.settings import OPENSTACK_RELEASE_UBUNTU
+from fuelweb_test.settings import OSTF_ABORT_ON_FAILURES
 from fuelweb_test.settings import OSTF_TEST_NAME
 from fuelweb_test.settings import OSTF_TEST_RETRIES_COUNT
 from fuelweb_test.settings import REPLACE_DEFAULT_REPOS
 from fuelweb_test.settings import REPLACE_DEFAULT_REPOS_ONLY_ONCE
-from fuelweb_test.settings import TIMEOUT
+from fuelweb_test.settings import TASK_STALL_TIMEOUT
 from fuelweb_test.settings import VCENTER_DATACENTER
 from fuelweb_test.settings import VCENTER_DATASTORE
 from fuelweb_test.settings import USER_OWNED_CERT
@@ -89,6 +96,8 @@ class FuelWebClient(object):
     def __init__(self, admin_node_ip, environment):
         self.admin_node_ip = admin_node_ip
         self.client = NailgunClient(admin_node_ip)
+        self.nodes_registry = NailgunNodesRegistry(self.client)
+        self.devops_nodes_index = DevopsNodesIndex(environment)
         self._environment = environment
         self.security = SecurityChecks(self.client, self._environment)
         super(FuelWebClient, self).__init__()
@@ -108,19 +117,56 @@ class FuelWebClient(object):
         checkers.verify_network_list_api(os_conn, networks_count)
 
     @logwrap
-    def _ostf_test_wait(self, cluster_id, timeout):
+    def _ostf_test_wait(self, cluster_id, timeout, test_sets=None,
+                        should_fail=None):
+        """Wait for OSTF test runs to finish reporting results of tests
+        as soon as they are known.
+
+        :param test_sets: List, count failures only in these sets
+        :param should_fail: Int, stop the runs when more tests have failed
+                            (None to wait for all the tests)
+            :rtype: List of test runs
+        """
         logger.info('Wait OSTF tests at cluster #%s for %s seconds',
                     cluster_id, timeout)
-        wait(
-            lambda: all([run['status'] == 'finished'
-                         for run in
-                         self.client.get_ostf_test_run(cluster_id)]),
-            timeout=timeout)
-        return self.client.get_ostf_test_run(cluster_id)
+        statuses = {}
+        runs = []
+
+        def _check_runs():
+            runs[:] = self.client.get_ostf_test_run(cluster_id)
+            failed = 0
+            for run in runs:
+                for test in run['tests']:
+                    if statuses.get(test['id']) != test['status']:
+                        statuses[test['id']] = test['status']
+                        if test['status'] not in ('wait_running', 'running'):
+                            logger.info('OSTF test "{0}": {1} {2}'.format(
+                                test['name'], test['status'],
+                                test.get('message') or ''))
+                    if (test['status'] in ('failure', 'error') and
+                            (test_sets is None or
+                             run['testset'] in test_sets)):
+                        failed += 1
+            if all([run['status'] == 'finished' for run in runs]):
+                return True
+            if should_fail is not None and failed > should_fail:
+                logger.error('{0} OSTF tests have failed while {1} are '
+                             'expected, stop the test runs'.format(
+                                 failed, should_fail))
+                self.client.ostf_stop_tests(
+                    [run['id'] for run in runs
+                     if run['status'] != 'finished'])
+                return True
+            return False
+
+        wait_adaptive(_check_runs, timeout=timeout, name='OSTF tests')
+        return runs
 
     @logwrap
     def _tasks_wait(self, tasks, timeout):
-        return [self.task_wait(task, timeout) for task in tasks]
+        finished = {task['id']: task for task in
+                    self.tasks_wait(tasks, timeout)}
+        return [finished[task['id']] for task in tasks]
 
     @logwrap
     def add_syslog_server(self, cluster_id, host, port):
@@ -212,16 +258,20 @@ class FuelWebClient(object):
 
     @logwrap
     def assert_ostf_run(self, cluster_id, should_fail=0, failed_test_name=None,
-                        timeout=15 * 60, test_sets=None):
+                        timeout=15 * 60, test_sets=None,
+                        abort_on_failures=OSTF_ABORT_ON_FAILURES):
         """Wait for OSTF tests to finish, check that there is no failed tests.
            If [failed_test_name] tests are expected, ensure that these tests
-           are not passed"""
+           are not passed. If [abort_on_failures], the tests are stopped as
+           soon as more than [should_fail] tests have failed"""
 
         logger.info('Assert OSTF run at cluster #{0}. '
                     'Should fail {1} tests named {2}'.format(cluster_id,
                                                              should_fail,
                                                              failed_test_name))
-        set_result_list = self._ostf_test_wait(cluster_id, timeout)
+        set_result_list = self._ostf_test_wait(
+            cluster_id, timeout, test_sets=test_sets,
+            should_fail=should_fail if abort_on_failures else None)
         failed_tests_res = []
         failed = 0
         actual_failed_names = []
@@ -301,7 +351,8 @@ class FuelWebClient(object):
 
     @logwrap
     def assert_task_success(
-            self, task, timeout=130 * 60, interval=5, progress=None):
+            self, task, timeout=130 * 60, interval=5, progress=None,
+            track_progress=False):
         def _message(_task):
             if 'message' in _task:
                 return _task['message']
@@ -310,7 +361,8 @@ class FuelWebClient(object):
 
         logger.info('Assert task %s is success', task)
         if not progress:
-            task = self.task_wait(task, timeout, interval)
+            task = self.task_wait(task, timeout, interval,
+                                  track_progress=track_progress)
             assert_equal(
                 task['status'], 'ready',
                 "Task '{0}' has incorrect status. {1} != {2}, '{3}'".format(
@@ -320,7 +372,8 @@ class FuelWebClient(object):
         else:
             logger.info('Start to polling task progress')
             task = self.task_wait_progress(
-                task, timeout=timeout, interval=interval, progress=progress)
+                task, timeout=timeout, interval=interval, progress=progress,
+                track_progress=track_progress)
             assert_not_equal(
                 task['status'], 'error',
                 "Task '{0}' has error status. '{1}'"
@@ -382,9 +435,10 @@ class FuelWebClient(object):
         online = sorted([self.fqdn(n) for n in online_nodes])
         offline = sorted([self.fqdn(n) for n in offline_nodes])
         try:
-            wait(lambda: self.get_pcm_nodes(ctrl_node)['Online'] == online and
-                 self.get_pcm_nodes(ctrl_node)['Offline'] == offline,
-                 timeout=60)
+            wait_adaptive(
+                lambda: self.get_pcm_nodes(ctrl_node)['Online'] == online and
+                self.get_pcm_nodes(ctrl_node)['Offline'] == offline,
+                timeout=60, name='pacemaker status')
         except TimeoutError:
             nodes = self.get_pcm_nodes(ctrl_node)
             assert_true(nodes['Online'] == online,
@@ -705,14 +759,17 @@ class FuelWebClient(object):
         if not is_feature:
             logger.info('Deploy cluster %s', cluster_id)
             task = self.deploy_cluster(cluster_id)
-            self.assert_task_success(task, interval=interval, timeout=timeout)
+            self.assert_task_success(task, interval=interval, timeout=timeout,
+                                     track_progress=True)
         else:
             logger.info('Provision nodes of a cluster %s', cluster_id)
             task = self.client.provision_nodes(cluster_id)
-            self.assert_task_success(task, timeout=timeout, interval=interval)
+            self.assert_task_success(task, timeout=timeout, interval=interval,
+                                     track_progress=True)
             logger.info('Deploy nodes of a cluster %s', cluster_id)
             task = self.client.deploy_nodes(cluster_id)
-            self.assert_task_success(task, timeout=timeout, interval=interval)
+            self.assert_task_success(task, timeout=timeout, interval=interval,
+                                     track_progress=True)
         if check_services:
             self.assert_ha_services_ready(cluster_id)
             self.assert_os_services_ready(cluster_id)
@@ -721,36 +778,45 @@ class FuelWebClient(object):
                 copy_cert_from_master(admin_remote, cluster_id)
         n_nodes = self.client.list_cluster_nodes(cluster_id)
         n_nodes = filter(lambda n: 'ready' in n['status'], n_nodes)
-        for n in n_nodes:
+        n_nodes = dict((n['id'], n) for n in n_nodes)
+
+        def get_node_status(node_id):
+            n = n_nodes[node_id]
             node = self.get_devops_node_by_nailgun_node(n)
-            if node:
-                node_name = node.name
-                with self.get_ssh_for_node(node_name) as remote:
-                    free = node_freemem(remote)
-                    hiera_roles = get_node_hiera_roles(remote)
-                node_status = {
-                    node_name:
+            if not node:
+                return None
+            with self.get_ssh_for_node(node.name) as remote:
+                free = node_freemem(remote)
+                hiera_roles = get_node_hiera_roles(remote)
+            return {
+                node.name:
+                {
+                    'Host': n['hostname'],
+                    'Roles':
+                    {
+                        'Nailgun': n['roles'],
+                        'Hiera': hiera_roles,
+                    },
+                    'Memory':
                     {
-                        'Host': n['hostname'],
-                        'Roles':
-                        {
-                            'Nailgun': n['roles'],
-                            'Hiera': hiera_roles,
-                        },
-                        'Memory':
-                        {
-                            'RAM': free['mem'],
-                            'SWAP': free['swap'],
-                        },
+                        'RAM': free['mem'],
+                        'SWAP': free['swap'],
                     },
-                }
+                },
+            }
 
-                logger.info('Node status: {}'.format(pretty_log(node_status,
-                                                                indent=1)))
+        statuses, errors = run_concurrently(get_node_status, n_nodes)
+        if errors:
+            raise errors.values()[0]
+        for node_id in sorted(statuses):
+            if statuses[node_id]:
+                logger.info('Node status: {}'.format(
+                    pretty_log(statuses[node_id], indent=1)))
 
     def deploy_cluster_wait_progress(self, cluster_id, progress):
         task = self.deploy_cluster(cluster_id)
-        self.assert_task_success(task, interval=30, progress=progress)
+        self.assert_task_success(task, interval=30, progress=progress,
+                                 track_progress=True)
 
     @logwrap
     def deploy_cluster(self, cluster_id):
@@ -843,10 +909,7 @@ class FuelWebClient(object):
     def get_nailgun_node_by_base_name(self, base_node_name):
         logger.debug('Get nailgun node by "{0}" base '
                      'node name.'.format(base_node_name))
-        nodes = self.client.list_nodes()
-        for node in nodes:
-            if base_node_name in node['name']:
-                return node
+        return self.nodes_registry.get_by_base_name(base_node_name)
 
     @logwrap
     def get_nailgun_node_by_devops_node(self, devops_node):
@@ -854,35 +917,28 @@ class FuelWebClient(object):
         Returns dict with nailgun slave node description if node is
         registered. Otherwise return None.
         """
-        d_macs = {EUI(i.mac_address) for i in devops_node.interfaces}
-        logger.debug('Verify that nailgun api is running')
-        attempts = ATTEMPTS
-        nodes = []
-        while attempts > 0:
-            logger.debug(
-                'current timeouts is {0} count of '
-                'attempts is {1}'.format(TIMEOUT, attempts))
-            try:
-                nodes = self.client.list_nodes()
-                logger.debug('Got nodes %s', nodes)
-                attempts = 0
-            except Exception:
-                logger.debug(traceback.format_exc())
-                attempts -= 1
-                time.sleep(TIMEOUT)
+        d_macs = [i.mac_address for i in devops_node.interfaces]
         logger.debug('Look for nailgun node by macs %s', d_macs)
-        for nailgun_node in nodes:
-            macs = {EUI(i['mac']) for i in nailgun_node['meta']['interfaces']}
-            logger.debug('Look for macs returned by nailgun {0}'.format(macs))
-            # Because our HAproxy may create some interfaces
-            if d_macs.issubset(macs):
-                nailgun_node['devops_name'] = devops_node.name
-                return nailgun_node
+        nailgun_node = self.nodes_registry.get_by_macs(d_macs)
+        if nailgun_node is not None:
+            nailgun_node['devops_name'] = devops_node.name
+            return nailgun_node
         # On deployed environment MAC addresses of bonded network interfaces
         # are changes and don't match addresses associated with devops node
         if help_data.BONDING:
             return self.get_nailgun_node_by_base_name(devops_node.name)
 
+    @logwrap
+    def get_nailgun_nodes_by_devops_nodes(self, devops_nodes):
+        """Return nailgun nodes of the devops nodes using one nodes list
+
+        :type devops_nodes: List
+            :rtype: List of Dicts (None for unregistered nodes)
+        """
+        self.nodes_registry.refresh()
+        return [self.get_nailgun_node_by_devops_node(node)
+                for node in devops_nodes]
+
     @logwrap
     def get_nailgun_node_by_fqdn(self, fqdn):
         """Return nailgun node with fqdn
@@ -890,9 +946,7 @@ class FuelWebClient(object):
         :type fqdn: String
             :rtype: Dict
         """
-        for nailgun_node in self.client.list_nodes():
-            if nailgun_node['meta']['system']['fqdn'] == fqdn:
-                return nailgun_node
+        return self.nodes_registry.get_by_fqdn(fqdn)
 
     @logwrap
     def find_devops_node_by_nailgun_fqdn(self, fqdn, devops_nodes):
@@ -904,10 +958,14 @@ class FuelWebClient(object):
         """
         nailgun_node = self.get_nailgun_node_by_fqdn(fqdn)
         macs = {EUI(i['mac']) for i in nailgun_node['meta']['interfaces']}
-        for devops_node in devops_nodes:
-            devops_macs = {EUI(i.mac_address) for i in devops_node.interfaces}
-            if devops_macs == macs:
-                return devops_node
+        devops_node = self.devops_nodes_index.get_by_mac(nailgun_node['mac'])
+        if devops_node is None:
+            return None
+        if self.devops_nodes_index.get_macs(devops_node) != macs:
+            return None
+        for node in devops_nodes:
+            if node.name == devops_node.name:
+                return node
 
     @logwrap
     def get_devops_node_by_mac(self, mac_address):
@@ -916,10 +974,7 @@ class FuelWebClient(object):
         :type mac_address: String
             :rtype: Node or None
         """
-        for node in self.environment.d_env.nodes():
-            for iface in node.interfaces:
-                if EUI(iface.mac_address) == EUI(mac_address):
-                    return node
+        return self.devops_nodes_index.get_by_mac(mac_address)
 
     @logwrap
     def get_devops_nodes_by_nailgun_nodes(self, nailgun_nodes):
@@ -928,8 +983,8 @@ class FuelWebClient(object):
         :type nailgun_nodes: List
             :rtype: list of Nodes or None
         """
-        d_nodes = [self.get_devops_node_by_nailgun_node(n) for n
-                   in nailgun_nodes]
+        d_nodes = self.devops_nodes_index.get_by_macs(
+            [n['mac'] for n in nailgun_nodes if n])
         d_nodes = [n for n in d_nodes if n is not None]
         return d_nodes if len(d_nodes) == len(nailgun_nodes) else None
 
@@ -972,7 +1027,7 @@ class FuelWebClient(object):
             self.environment.d_env.get_node(name=node_name))
         assert_true(node is not None,
                     'Node with name "{0}" not found!'.format(node_name))
-        return self.environment.d_env.get_ssh_to_remote(node['ip'])
+        return self.environment.get_ssh_to_remote(node['ip'])
 
     @logwrap
     def get_ssh_for_role(self, nodes_dict, role):
@@ -982,7 +1037,7 @@ class FuelWebClient(object):
 
     @logwrap
     def get_ssh_for_nailgun_node(self, nailgun_node):
-        return self.environment.d_env.get_ssh_to_remote(nailgun_node['ip'])
+        return self.environment.get_ssh_to_remote(nailgun_node['ip'])
 
     @logwrap
     def is_node_discovered(self, nailgun_node):
@@ -1051,21 +1106,45 @@ class FuelWebClient(object):
                                          timeout=timeout)
 
     @logwrap
-    def task_wait(self, task, timeout, interval=5):
+    def task_wait(self, task, timeout, interval=5, track_progress=False):
+        """Wait until the task is finished
+
+        :param track_progress: Bool, fail if progress of the task has not
+                               changed for TASK_STALL_TIMEOUT seconds and
+                               save timeline of the progress
+        """
         logger.info('Wait for task {0} seconds: {1}'.format(
                     timeout, pretty_log(task, indent=1)))
         start = time.time()
+        tracker = ProgressTracker(
+            '{0}-{1}'.format(task['name'], task['id']),
+            stall_timeout=TASK_STALL_TIMEOUT if track_progress else 0)
+
+        def _check_task():
+            current = self.client.get_task(task['id'])
+            tracker.add(current['progress'])
+            if current['status'] not in ('pending', 'running'):
+                return True
+            tracker.check_stall()
+            return False
+
         try:
-            wait(
-                lambda: (self.client.get_task(task['id'])['status']
-                         not in ('pending', 'running')),
+            wait_adaptive(
+                _check_task,
                 interval=interval,
-                timeout=timeout
+                timeout=timeout,
+                progress=lambda: tracker.progress,
+                name='task {0}'.format(task['name'])
             )
+        except ProgressStalledError:
+            raise
         except TimeoutError:
             raise TimeoutError(
                 "Waiting task \"{task}\" timeout {timeout} sec "
                 "was exceeded: ".format(task=task["name"], timeout=timeout))
+        finally:
+            if track_progress:
+                tracker.save_timeline()
         took = time.time() - start
         task = self.client.get_task(task['id'])
         logger.info('Task finished. Took {0} seconds. {1}'.format(
@@ -1074,21 +1153,94 @@ class FuelWebClient(object):
         return task
 
     @logwrap
-    def task_wait_progress(self, task, timeout, interval=5, progress=None):
+    def tasks_wait(self, tasks, timeout, interval=5, fail_fast=False):
+        """Wait for many tasks at once polling the list of all tasks
+
+        :type tasks: List of Dicts
+        :type timeout: Int
+        :type interval: Int
+        :param fail_fast: Bool, stop waiting and raise AssertionError
+                          as soon as any task fails
+            :rtype: List of Dicts, finished tasks in order of completion
+        """
+        logger.info('Wait for tasks {0} seconds: {1}'.format(
+                    timeout, [task['name'] for task in tasks]))
+        start = time.time()
+        pending = {task['id']: task for task in tasks}
+        finished = []
+        failed = []
+
+        def _check_tasks():
+            current = {task['id']: task for task in self.client.get_tasks()}
+            for task_id in sorted(pending):
+                task = current.get(task_id)
+                if task is None:
+                    # The task is not listed anymore, ask about it directly
+                    task = self.client.get_task(task_id)
+                if task['status'] in ('pending', 'running'):
+                    continue
+                del pending[task_id]
+                logger.info('Task finished. Took {0} seconds. {1}'.format(
+                            time.time() - start,
+                            pretty_log(task, indent=1)))
+                finished.append(task)
+                if task['status'] != 'ready':
+                    failed.append(task)
+            return not pending or (fail_fast and failed)
+
+        try:
+            wait_adaptive(_check_tasks, interval=interval, timeout=timeout,
+                          name='tasks')
+        except TimeoutError:
+            raise TimeoutError(
+                "Waiting tasks {tasks} timeout {timeout} sec "
+                "was exceeded: ".format(
+                    tasks=[task['name'] for task in pending.values()],
+                    timeout=timeout))
+        if fail_fast and failed:
+            raise AssertionError('Tasks have failed: {0}'.format(
+                '; '.join("'{0}' ({1}): '{2}'".format(
+                    task['name'], task['status'], task.get('message', ''))
+                    for task in failed)))
+        return finished
+
+    @logwrap
+    def task_wait_progress(self, task, timeout, interval=5, progress=None,
+                           track_progress=False):
+        """Wait until progress of the task reaches the value, see
+        task_wait() for track_progress
+        """
+        tracker = ProgressTracker(
+            '{0}-{1}'.format(task['name'], task['id']),
+            stall_timeout=TASK_STALL_TIMEOUT if track_progress else 0)
+
+        def _check_progress():
+            tracker.add(self.client.get_task(task['id'])['progress'])
+            if tracker.progress >= progress:
+                return True
+            tracker.check_stall()
+            return False
+
         try:
             logger.info(
                 'start to wait with timeout {0} '
                 'interval {1}'.format(timeout, interval))
-            wait(
-                lambda: self.client.get_task(
-                    task['id'])['progress'] >= progress,
+            wait_adaptive(
+                _check_progress,
                 interval=interval,
-                timeout=timeout
+                timeout=timeout,
+                progress=lambda: tracker.progress,
+                name='task {0} progress'.format(task['name'])
             )
+        except ProgressStalledError:
+            raise
         except TimeoutError:
             raise TimeoutError(
                 "Waiting task \"{task}\" timeout {timeout} sec "
                 "was exceeded: ".format(task=task["name"], timeout=timeout))
+        finally:
+            if track_progress:
+                tracker.save_timeline()
 
         return self.client.get_task(task['id'])
 
@@ -1168,8 +1320,10 @@ class FuelWebClient(object):
     @logwrap
     def update_node_networks(self, node_id, interfaces_dict,
                              raw_data=None,
-                             override_ifaces_params=None):
-        interfaces = self.client.get_node_interfaces(node_id)
+                             override_ifaces_params=None,
+                             interfaces=None):
+        if interfaces is None:
+            interfaces = self.client.get_node_interfaces(node_id)
 
         if raw_data is not None:
             interfaces.extend(raw_data)
@@ -1215,9 +1369,8 @@ class FuelWebClient(object):
         self.client.put_node_interfaces(
             [{'id': node_id, 'interfaces': interfaces}])
 
-    @logwrap
-    def update_node_disk(self, node_id, disks_dict):
-        disks = self.client.get_node_disks(node_id)
+    @staticmethod
+    def _set_disks_volumes(disks, disks_dict):
         for disk in disks:
             dname = disk['name']
             if dname not in disks_dict:
@@ -1227,11 +1380,8 @@ class FuelWebClient(object):
                 if vname in disks_dict[dname]:
                     volume['size'] = disks_dict[dname][vname]
 
-        self.client.put_node_disks(node_id, disks)
-
-    @logwrap
-    def get_node_disk_size(self, node_id, disk_name):
-        disks = self.client.get_node_disks(node_id)
+    @staticmethod
+    def _get_disk_size(disks, disk_name):
         size = 0
         for disk in disks:
             if disk['name'] == disk_name:
@@ -1239,17 +1389,41 @@ class FuelWebClient(object):
                     size += volume['size']
         return size
 
+    @logwrap
+    def update_node_disk(self, node_id, disks_dict):
+        disks = self.client.get_node_disks(node_id)
+        self._set_disks_volumes(disks, disks_dict)
+        self.client.put_node_disks(node_id, disks)
+
+    @logwrap
+    def get_node_disk_size(self, node_id, disk_name):
+        disks = self.client.get_node_disks(node_id)
+        return self._get_disk_size(disks, disk_name)
+
     @logwrap
     def update_node_partitioning(self, node, disk='vdc',
                                  node_role='cinder', unallocated_size=11116):
-        node_size = self.get_node_disk_size(node['id'], disk)
-        disk_part = {
-            disk: {
-                node_role: node_size - unallocated_size
-            }
-        }
-        self.update_node_disk(node['id'], disk_part)
-        return node_size - unallocated_size
+        return self.update_nodes_partitioning(
+            [node], disk, node_role, unallocated_size)[node['id']]
+
+    @logwrap
+    def update_nodes_partitioning(self, nodes, disk='vdc',
+                                  node_role='cinder', unallocated_size=11116):
+        """Allocate the disk of every node for the role, requests to
+        the nodes are sent concurrently.
+
+        :type nodes: List of nailgun nodes
+            :rtype: Dict of allocated sizes keyed by node ID
+        """
+        nodes_disks = self.client.get_nodes_disks(
+            [node['id'] for node in nodes])
+        sizes = {}
+        for node_id, disks in nodes_disks.items():
+            sizes[node_id] = \
+                self._get_disk_size(disks, disk) - unallocated_size
+            self._set_disks_volumes(disks, {disk: {node_role: sizes[node_id]}})
+        self.client.put_nodes_disks(nodes_disks)
+        return sizes
 
     @logwrap
     def update_vlan_network_fixed(
@@ -1343,8 +1517,11 @@ class FuelWebClient(object):
 
         if not nailgun_nodes:
             nailgun_nodes = self.client.list_cluster_nodes(cluster_id)
+        interfaces = self.client.get_nodes_interfaces(
+            [node['id'] for node in nailgun_nodes])
         for node in nailgun_nodes:
-            self.update_node_networks(node['id'], assigned_networks)
+            self.update_node_networks(node['id'], assigned_networks,
+                                      interfaces=interfaces[node['id']])
 
     @logwrap
     def update_offloads(self, node_id, update_values, interface_to_update):
@@ -1646,11 +1823,14 @@ class FuelWebClient(object):
                     'Node {0} has not become '
                     'offline after warm shutdown'.format(node.name))
             node.destroy()
+        # Pooled connections to the nodes are dead now
+        ssh_pool.clear()
 
     def warm_start_nodes(self, devops_nodes):
         logger.info('Starting nodes %s', [n.name for n in devops_nodes])
         for node in devops_nodes:
             node.create()
+        ssh_pool.clear()
         for node in devops_nodes:
             try:
                 wait(
@@ -1676,6 +1856,7 @@ class FuelWebClient(object):
         for node in devops_nodes:
             logger.info('Destroy node %s', node.name)
             node.destroy()
+        ssh_pool.clear()
         for node in devops_nodes:
             if wait_offline:
                 logger.info('Wait a %s node offline status', node.name)
@@ -1749,14 +1930,15 @@ class FuelWebClient(object):
     def provisioning_cluster_wait(self, cluster_id, progress=None):
         logger.info('Start cluster #%s provisioning', cluster_id)
         task = self.client.provision_nodes(cluster_id)
-        self.assert_task_success(task, progress=progress)
+        self.assert_task_success(task, progress=progress,
+                                 track_progress=True)
 
     @logwrap
     def deploy_task_wait(self, cluster_id, progress):
         logger.info('Start cluster #%s deployment', cluster_id)
         task = self.client.deploy_nodes(cluster_id)
         self.assert_task_success(
-            task, progress=progress)
+            task, progress=progress, track_progress=True)
 
     @logwrap
     def stop_deployment_wait(self, cluster_id):
@@ -1793,19 +1975,24 @@ class FuelWebClient(object):
 
     @logwrap
     def wait_nodes_get_online_state(self, nodes, timeout=4 * 60):
-        for node in nodes:
+        def _wait_online(node, _timeout):
             logger.info('Wait for %s node online status', node.name)
             try:
-                wait(lambda:
-                     self.get_nailgun_node_by_devops_node(node)['online'],
-                     timeout=timeout)
+                wait_adaptive(
+                    lambda:
+                    self.get_nailgun_node_by_devops_node(node)['online'],
+                    timeout=_timeout,
+                    name='{0} online status'.format(node.name))
             except TimeoutError:
                 assert_true(
                     self.get_nailgun_node_by_devops_node(node)['online'],
                     'Node {0} has not become online'.format(node.name))
-            node = self.get_nailgun_node_by_devops_node(node)
-            assert_true(node['online'],
-                        'Node {0} is online'.format(node['mac']))
+            nailgun_node = self.get_nailgun_node_by_devops_node(node)
+            assert_true(nailgun_node['online'],
+                        'Node {0} is online'.format(nailgun_node['mac']))
+
+        return wait_nodes_ready(_wait_online, nodes, timeout,
+                                name='Nodes online state')
 
     @logwrap
     def wait_mysql_galera_is_up(self, node_names, timeout=60 * 4):
@@ -1819,11 +2006,11 @@ class FuelWebClient(object):
             else:
                 return ''.join(result['stderr']).strip()
 
-        for node_name in node_names:
+        def _wait_galera(node_name, _timeout):
             with self.get_ssh_for_node(node_name) as remote:
                 try:
-                    wait(lambda: _get_galera_status(remote) == 'ON',
-                         timeout=timeout)
+                    wait_adaptive(lambda: _get_galera_status(remote) == 'ON',
+                                  timeout=_timeout)
                     logger.info("MySQL Galera is up on {host} node.".format(
                                 host=node_name))
                 except TimeoutError:
@@ -1833,21 +2020,29 @@ class FuelWebClient(object):
                     raise TimeoutError(
                         "MySQL Galera isn't ready on {0}: {1}".format(
                             node_name, _get_galera_status(remote)))
+
+        wait_nodes_ready(_wait_galera, node_names, timeout,
+                         name='MySQL Galera')
         return True
 
     @logwrap
     def wait_cinder_is_up(self, node_names):
         logger.info("Waiting for all Cinder services up.")
-        for node_name in node_names:
+
+        def _wait_cinder(node_name, _timeout):
             with self.get_ssh_for_node(node_name) as remote:
                 try:
-                    wait(lambda: checkers.check_cinder_status(remote),
-                         timeout=300)
+                    wait_adaptive(
+                        lambda: checkers.check_cinder_status(remote),
+                        timeout=_timeout)
                     logger.info("All Cinder services up.")
                 except TimeoutError:
                     logger.error("Cinder services not ready.")
                     raise TimeoutError(
                         "Cinder services not ready. ")
+
+        wait_nodes_ready(_wait_cinder, node_names, 300,
+                         name='Cinder services')
         return True
 
     def run_ostf_repeatably(self, cluster_id, test_name=None,
@@ -1911,7 +2106,7 @@ class FuelWebClient(object):
         # Let's find nodes where are a time skew. It can be checked on
         # an arbitrary one.
         logger.debug("Looking up nodes with a time skew and try to fix them")
-        with self.environment.d_env.get_ssh_to_remote(
+        with self.environment.get_ssh_to_remote(
                 online_ceph_nodes[0]['ip']) as remote:
             if ceph.is_clock_skew(remote):
                 skewed = ceph.get_node_fqdns_w_clock_skew(remote)
@@ -1953,23 +2148,29 @@ class FuelWebClient(object):
             n for n in ceph_nodes if n['id'] not in offline_nodes]
 
         logger.info('Waiting until Ceph service become up...')
-        for node in online_ceph_nodes:
-            with self.environment.d_env\
-                    .get_ssh_to_remote(node['ip']) as remote:
+        nodes_ips = {n['name']: n['ip'] for n in online_ceph_nodes}
+
+        def _wait_ceph_service(node_name, _timeout):
+            with self.environment\
+                    .get_ssh_to_remote(nodes_ips[node_name]) as remote:
                 try:
-                    wait(lambda: ceph.check_service_ready(remote) is True,
-                         interval=20, timeout=600)
+                    wait_adaptive(
+                        lambda: ceph.check_service_ready(remote) is True,
+                        interval=20, timeout=_timeout)
                 except TimeoutError:
                     error_msg = 'Ceph service is not properly started' \
-                                ' on {0}'.format(node['name'])
+                                ' on {0}'.format(node_name)
                     logger.error(error_msg)
                     raise TimeoutError(error_msg)
 
+        wait_nodes_ready(_wait_ceph_service, nodes_ips.keys(), 600,
+                         name='Ceph service')
+
         logger.info('Ceph service is ready. Checking Ceph Health...')
         self.check_ceph_time_skew(cluster_id, offline_nodes)
 
         node = online_ceph_nodes[0]
-        with self.environment.d_env.get_ssh_to_remote(node['ip']) as remote:
+        with self.environment.get_ssh_to_remote(node['ip']) as remote:
             if not ceph.is_health_ok(remote):
                 if ceph.is_pgs_recovering(remote) and len(offline_nodes) > 0:
                     logger.info('Ceph is being recovered after osd node(s)'
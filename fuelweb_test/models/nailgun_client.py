@@ -12,24 +12,47 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import json
+import threading
+
 from fuelweb_test import logwrap
 from fuelweb_test import logger
+from fuelweb_test.helpers.decorators import count_changes
+from fuelweb_test.helpers.decorators import invalidate_cache
 from fuelweb_test.helpers.decorators import json_parse
 from fuelweb_test.helpers.http import HTTPClient
+from fuelweb_test.helpers.http import ResponseCache
+from fuelweb_test.helpers.utils import run_concurrently
+from fuelweb_test.settings import CONCURRENCY
 from fuelweb_test.settings import KEYSTONE_CREDS
+from fuelweb_test.settings import NAILGUN_CACHE_ENABLED
+from fuelweb_test.settings import NAILGUN_CACHE_TTL
 from fuelweb_test.settings import OPENSTACK_RELEASE
 
+# Groups of cached responses which depend on a cluster state. Responses
+# with a status or progress of cluster (e.g. /api/clusters/<id>) are never
+# cached, because they are changed by Nailgun itself during deployment.
+CLUSTER_CACHE = ('cluster_attributes', 'networks')
+
 
 class NailgunClient(object):
     """NailgunClient"""  # TODO documentation
 
-    def __init__(self, admin_node_ip, **kwargs):
+    def __init__(self, admin_node_ip, cache_enabled=NAILGUN_CACHE_ENABLED,
+                 concurrency=CONCURRENCY, **kwargs):
         url = "http://{0}:8000".format(admin_node_ip)
         logger.info('Initiate Nailgun client with url %s', url)
         self.keystone_url = "http://{0}:5000/v2.0".format(admin_node_ip)
         self._client = HTTPClient(url=url, keystone_url=self.keystone_url,
                                   credentials=KEYSTONE_CREDS,
                                   **kwargs)
+        self.cache = ResponseCache(NAILGUN_CACHE_TTL) if cache_enabled \
+            else None
+        self.concurrency = concurrency
+        # Number of requests which have changed data via API, it's
+        # incremented from threads of fan_out() too, so under the lock
+        self.changes_count = 0
+        self.changes_lock = threading.Lock()
         super(NailgunClient, self).__init__()
 
     def __repr__(self):
@@ -43,6 +66,29 @@ class NailgunClient(object):
     def client(self):
         return self._client
 
+    def fan_out(self, func, node_ids):
+        """Call func(node_id) for all the nodes in a pool of threads
+        :return: tuple of dicts (results, errors) keyed by node ID
+        """
+        return run_concurrently(func, node_ids,
+                                concurrency=self.concurrency)
+
+    def _fan_out(self, func, node_ids):
+        results, errors = self.fan_out(func, node_ids)
+        if errors:
+            for node_id, error in errors.items():
+                logger.error('Request for node {0} failed: {1}'.format(
+                    node_id, error))
+            # Raise the original exception, e.g. HTTPError with a code
+            raise errors.values()[0]
+        return results
+
+    def _get_cached(self, group, endpoint):
+        """GET the endpoint through the response cache, if it's enabled."""
+        if self.cache is None:
+            return json.loads(self.client.get(endpoint).read())
+        return json.loads(self.cache.get(self.client, group, endpoint))
+
     @logwrap
     def get_root(self):
         return self.client.get("/")
@@ -56,10 +102,10 @@ class NailgunClient(object):
         return self.client.get("/api/nodes/?cluster_id={}".format(cluster_id))
 
     @logwrap
-    @json_parse
     def get_networks(self, cluster_id):
         net_provider = self.get_cluster(cluster_id)['net_provider']
-        return self.client.get(
+        return self._get_cached(
+            'networks',
             "/api/clusters/{}/network_configuration/{}".format(
                 cluster_id, net_provider
             )
@@ -76,9 +122,9 @@ class NailgunClient(object):
             data=self.get_networks(cluster_id)
         )
 
-    @json_parse
     def get_cluster_attributes(self, cluster_id):
-        return self.client.get(
+        return self._get_cached(
+            'cluster_attributes',
             "/api/clusters/{}/attributes/".format(cluster_id)
         )
 
@@ -89,6 +135,7 @@ class NailgunClient(object):
         )
 
     @logwrap
+    @invalidate_cache('cluster_attributes', 'networks')
     @json_parse
     def update_cluster_attributes(self, cluster_id, attrs):
         return self.client.put(
@@ -97,6 +144,7 @@ class NailgunClient(object):
         )
 
     @logwrap
+    @invalidate_cache('cluster_attributes', 'networks')
     @json_parse
     def update_cluster_vmware_attributes(self, cluster_id, attrs):
         return self.client.put(
@@ -112,6 +160,7 @@ class NailgunClient(object):
         )
 
     @logwrap
+    @invalidate_cache(*CLUSTER_CACHE)
     @json_parse
     def update_cluster(self, cluster_id, data):
         return self.client.put(
@@ -120,6 +169,7 @@ class NailgunClient(object):
         )
 
     @logwrap
+    @invalidate_cache(*CLUSTER_CACHE)
     @json_parse
     def delete_cluster(self, cluster_id):
         return self.client.delete(
@@ -127,6 +177,7 @@ class NailgunClient(object):
         )
 
     @logwrap
+    @invalidate_cache('networks')
     @json_parse
     def update_node(self, node_id, data):
         return self.client.put(
@@ -134,6 +185,7 @@ class NailgunClient(object):
         )
 
     @logwrap
+    @invalidate_cache('networks')
     @json_parse
     def update_nodes(self, data):
         return self.client.put(
@@ -141,6 +193,7 @@ class NailgunClient(object):
         )
 
     @logwrap
+    @invalidate_cache('networks')
     @json_parse
     def delete_node(self, node_id):
         return self.client.delete(
@@ -148,6 +201,7 @@ class NailgunClient(object):
         )
 
     @logwrap
+    @invalidate_cache(*CLUSTER_CACHE)
     @json_parse
     def deploy_cluster_changes(self, cluster_id):
         return self.client.put(
@@ -165,24 +219,24 @@ class NailgunClient(object):
         return self.client.get("/api/tasks")
 
     @logwrap
-    @json_parse
     def get_releases(self):
-        return self.client.get("/api/releases/")
+        return self._get_cached('releases', "/api/releases/")
 
     @logwrap
-    @json_parse
     def get_release(self, release_id):
-        return self.client.get("/api/releases/{}".format(release_id))
+        return self._get_cached('releases',
+                                "/api/releases/{}".format(release_id))
 
     @logwrap
+    @invalidate_cache('releases')
     @json_parse
     def put_release(self, release_id, data):
         return self.client.put("/api/releases/{}".format(release_id), data)
 
     @logwrap
-    @json_parse
     def get_releases_details(self, release_id):
-        return self.client.get("/api/releases/{}".format(release_id))
+        return self._get_cached('releases',
+                                "/api/releases/{}".format(release_id))
 
     @logwrap
     @json_parse
@@ -194,6 +248,25 @@ class NailgunClient(object):
     def put_node_disks(self, node_id, data):
         return self.client.put("/api/nodes/{}/disks".format(node_id), data)
 
+    @logwrap
+    def get_nodes_disks(self, node_ids):
+        """Get disks of the nodes concurrently
+        :param node_ids: list of node IDs
+        :return: dict of disks keyed by node ID
+        """
+        return self._fan_out(self.get_node_disks, node_ids)
+
+    @logwrap
+    def put_nodes_disks(self, nodes_disks):
+        """Update disks of the nodes concurrently
+        :param nodes_disks: dict of disks keyed by node ID
+        :return: dict of responses keyed by node ID
+        """
+        return self._fan_out(
+            lambda node_id: self.put_node_disks(node_id,
+                                                nodes_disks[node_id]),
+            nodes_disks.keys())
+
     @logwrap
     def get_release_id(self, release_name=OPENSTACK_RELEASE):
         for release in self.get_releases():
@@ -207,6 +280,7 @@ class NailgunClient(object):
             release_id))
 
     @logwrap
+    @invalidate_cache('releases')
     @json_parse
     def put_release_default_net_settings(self, release_id, data):
         return self.client.put(
@@ -218,6 +292,15 @@ class NailgunClient(object):
         return self.client.get("/api/nodes/{}/interfaces".format(node_id))
 
     @logwrap
+    def get_nodes_interfaces(self, node_ids):
+        """Get interfaces of the nodes concurrently
+        :param node_ids: list of node IDs
+        :return: dict of interfaces keyed by node ID
+        """
+        return self._fan_out(self.get_node_interfaces, node_ids)
+
+    @logwrap
+    @invalidate_cache('networks')
     @json_parse
     def put_node_interfaces(self, data):
         return self.client.put("/api/nodes/interfaces", data)
@@ -228,6 +311,7 @@ class NailgunClient(object):
         return self.client.get("/api/clusters/")
 
     @logwrap
+    @invalidate_cache(*CLUSTER_CACHE)
     @json_parse
     def clone_environment(self, environment_id, data):
         return self.client.post(
@@ -235,6 +319,7 @@ class NailgunClient(object):
             data=data)
 
     @logwrap
+    @invalidate_cache(*CLUSTER_CACHE)
     @json_parse
     def reassign_node(self, cluster_id, data):
         return self.client.post(
@@ -243,6 +328,7 @@ class NailgunClient(object):
         )
 
     @logwrap
+    @invalidate_cache(*CLUSTER_CACHE)
     @json_parse
     def create_cluster(self, data):
         logger.info('Before post to nailgun')
@@ -301,6 +387,15 @@ class NailgunClient(object):
 
     @logwrap
     @json_parse
+    def ostf_stop_tests(self, test_run_ids):
+        logger.info('Stop OSTF test runs %s', test_run_ids)
+        data = [{'id': run_id, 'status': 'stopped'}
+                for run_id in test_run_ids]
+        return self.client.put("/ostf/testruns", data)
+
+    @logwrap
+    @invalidate_cache('networks')
+    @json_parse
     def update_network(self, cluster_id, networking_parameters=None,
                        networks=None):
         nc = self.get_networks(cluster_id)
@@ -372,6 +467,7 @@ class NailgunClient(object):
         return self.do_stop_reset_actions(cluster_id, action="reset")
 
     @logwrap
+    @invalidate_cache(*CLUSTER_CACHE)
     @json_parse
     def do_cluster_action(self, cluster_id, node_ids=None, action="provision"):
         if not node_ids:
@@ -385,6 +481,7 @@ class NailgunClient(object):
         )
 
     @logwrap
+    @invalidate_cache(*CLUSTER_CACHE)
     @json_parse
     def do_stop_reset_actions(self, cluster_id, action="stop_deployment"):
         return self.client.put(
@@ -396,12 +493,14 @@ class NailgunClient(object):
         return self.client.get("/api/version")
 
     @logwrap
+    @invalidate_cache(*CLUSTER_CACHE)
     @json_parse
     def run_update(self, cluster_id):
         return self.client.put(
             "/api/clusters/{0}/update/".format(str(cluster_id)))
 
     @logwrap
+    @invalidate_cache('networks')
     @json_parse
     def create_nodegroup(self, cluster_id, group_name):
         data = {"cluster_id": cluster_id, "name": group_name}
@@ -413,12 +512,14 @@ class NailgunClient(object):
         return self.client.get("/api/nodegroups/")
 
     @logwrap
+    @invalidate_cache('networks')
     @json_parse
     def assign_nodegroup(self, group_id, nodes):
         data = [{"group_id": group_id, "id": n["id"]} for n in nodes]
         return self.client.put("/api/nodes/", data)
 
     @logwrap
+    @invalidate_cache('networks')
     def delete_nodegroup(self, group_id):
         return self.client.delete("/api/nodegroups/{0}/".format(group_id))
 
@@ -473,6 +574,7 @@ class NailgunClient(object):
             '/api/clusters/{}/orchestrator/deployment'.format(cluster_id))
 
     @logwrap
+    @invalidate_cache(*CLUSTER_CACHE)
     @json_parse
     def put_deployment_tasks_for_cluster(self, cluster_id, data, node_id):
         """ Put  task to be executed on the nodes from cluster.:
@@ -486,12 +588,14 @@ class NailgunClient(object):
                 cluster_id, node_id), data)
 
     @logwrap
+    @invalidate_cache('releases')
     @json_parse
     def put_deployment_tasks_for_release(self, release_id, data):
         return self.client.put(
             '/api/releases/{}/deployment_tasks'.format(release_id), data)
 
     @logwrap
+    @count_changes
     @json_parse
     def set_hostname(self, node_id, new_hostname):
         """ Set a new hostname for the node"""
@@ -506,6 +610,7 @@ class NailgunClient(object):
                 cluster_id))
 
     @logwrap
+    @invalidate_cache('networks')
     @json_parse
     def upload_network_template(self, cluster_id, network_template):
         return self.client.put(
@@ -513,6 +618,7 @@ class NailgunClient(object):
                 cluster_id), network_template)
 
     @logwrap
+    @invalidate_cache('networks')
     @json_parse
     def delete_network_template(self, cluster_id):
         return self.client.delete(
@@ -530,11 +636,13 @@ class NailgunClient(object):
         return self.client.get('/api/networks/{0}/'.format(network_id))
 
     @logwrap
+    @invalidate_cache('networks')
     @json_parse
     def add_network_group(self, network_data):
         return self.client.post('/api/networks/', data=network_data)
 
     @logwrap
+    @invalidate_cache('networks')
     @json_parse
     def update_network_group(self, network_id, network_data):
         return self.client.put('/api/networks/{0}/'.format(network_id),
@@ -549,6 +657,7 @@ class NailgunClient(object):
         return self.client.put(url, {'vms_conf': data})
 
     @logwrap
+    @invalidate_cache(*CLUSTER_CACHE)
     @json_parse
     def spawn_vms(self, cluster_id):
         url = '/api/clusters/{0}/spawn_vms/'.format(cluster_id)
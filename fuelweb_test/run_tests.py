@@ -53,8 +53,9 @@ class CloseSSHConnectionsPlugin(Plugin):
     """Closes all paramiko's ssh connections after each test case
 
     Plugin fixes proboscis disability to run cleanup of any kind.
-    'afterTest' calls _join_lingering_threads function from paramiko,
-    which stops all threads (set the state to inactive and joins for 10s)
+    'afterTest' closes connections kept in the pool of SSH connections and
+    calls _join_lingering_threads function from paramiko, which stops all
+    threads (set the state to inactive and joins for 10s)
     """
     name = 'closesshconnections'
 
@@ -66,6 +67,8 @@ class CloseSSHConnectionsPlugin(Plugin):
         self.enabled = True
 
     def afterTest(self, *args, **kwargs):
+        from fuelweb_test.helpers.ssh_pool import ssh_pool
+        ssh_pool.clear()
         _join_lingering_threads()
 
 
@@ -49,6 +49,15 @@ def iface_alias(interface_name):
 
 ISO_PATH = os.environ.get('ISO_PATH')
 LOGS_DIR = os.environ.get('LOGS_DIR', os.getcwd())
+# Write debug messages to sys_test.log, logwrap does nothing if disabled.
+# Debug logging makes logwrap format arguments and results of every
+# wrapped call, so it is enabled only on demand
+LOGS_DEBUG = get_var_as_bool('LOGS_DEBUG', False)
+# Arguments and results logged by logwrap are summarized to so many
+# characters, 0 means no limit
+LOGWRAP_MAX_LENGTH = int(os.environ.get('LOGWRAP_MAX_LENGTH', 0))
+# Write sys_test.log from a background thread
+LOGS_QUEUE = get_var_as_bool('LOGS_QUEUE', True)
 # cdrom or usb
 ADMIN_BOOT_DEVICE = os.environ.get('ADMIN_BOOT_DEVICE', 'cdrom')
 DNS = os.environ.get('DNS', '8.8.8.8')
@@ -73,6 +82,9 @@ DEPLOYMENT_MODE_SIMPLE = "multinode"
 DEPLOYMENT_MODE_HA = "ha_compact"
 DEPLOYMENT_MODE = os.environ.get("DEPLOYMENT_MODE", DEPLOYMENT_MODE_HA)
 DEPLOYMENT_TIMEOUT = int(os.environ.get("DEPLOYMENT_TIMEOUT", 7800))
+# Fail waiting for a deployment or provisioning task if its progress has
+# not changed for this number of seconds, 0 disables the check
+TASK_STALL_TIMEOUT = int(os.environ.get("TASK_STALL_TIMEOUT", 60 * 60))
 
 ADMIN_NODE_SETUP_TIMEOUT = os.environ.get("ADMIN_NODE_SETUP_TIMEOUT", 30)
 PUPPET_TIMEOUT = os.environ.get("PUPPET_TIMEOUT", 6000)
@@ -328,6 +340,8 @@ OSTF_TEST_NAME = os.environ.get('OSTF_TEST_NAME',
                                 'Check network connectivity'
                                 ' from instance via floating IP')
 OSTF_TEST_RETRIES_COUNT = int(os.environ.get('OSTF_TEST_RETRIES_COUNT', 50))
+# Stop OSTF run as soon as more tests have failed than expected
+OSTF_ABORT_ON_FAILURES = get_var_as_bool('OSTF_ABORT_ON_FAILURES', False)
 
 # The variable below is only for test:
 #       fuelweb_test.tests.tests_strength.test_ostf_repeatable_tests
@@ -338,8 +352,42 @@ DEPLOYMENT_NAME = os.environ.get('DEPLOYMENT_NAME')
 TIMEOUT = int(os.environ.get('TIMEOUT', 60))
 ATTEMPTS = int(os.environ.get('ATTEMPTS', 5))
 
+# Pool of persistent connections used by HTTP clients (Nailgun, collector)
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 20))
+HTTP_POOL_MAXSIZE_PER_HOST = int(os.environ.get(
+    'HTTP_POOL_MAXSIZE_PER_HOST', 10))
+HTTP_POOL_IDLE_TIMEOUT = int(os.environ.get('HTTP_POOL_IDLE_TIMEOUT', 30))
+HTTP_POOL_WAIT_TIMEOUT = int(os.environ.get('HTTP_POOL_WAIT_TIMEOUT', 60))
+
+# Adaptive polling in wait loops: first interval in seconds, growth factor
+# of intervals and random share of every interval
+POLL_MIN_INTERVAL = float(os.environ.get('POLL_MIN_INTERVAL', 1))
+POLL_BACKOFF_FACTOR = float(os.environ.get('POLL_BACKOFF_FACTOR', 1.5))
+POLL_JITTER = float(os.environ.get('POLL_JITTER', 0.2))
+
+# Max number of simultaneous per-node calls (Nailgun API, SSH)
+CONCURRENCY = int(os.environ.get('CONCURRENCY', 10))
+# Slaves are started by groups of BOOTSTRAP_CONCURRENCY nodes with a pause
+# of BOOTSTRAP_RAMP_INTERVAL seconds between groups (LP#1317213)
+BOOTSTRAP_CONCURRENCY = int(os.environ.get('BOOTSTRAP_CONCURRENCY', 1))
+BOOTSTRAP_RAMP_INTERVAL = float(os.environ.get('BOOTSTRAP_RAMP_INTERVAL', 5))
+
+# Cache of rarely changed Nailgun API responses, TTLs are in seconds
+NAILGUN_CACHE_ENABLED = get_var_as_bool('NAILGUN_CACHE_ENABLED', False)
+NAILGUN_CACHE_TTL = {
+    'releases': int(os.environ.get('NAILGUN_CACHE_TTL_RELEASES', 600)),
+    'cluster_attributes': int(os.environ.get(
+        'NAILGUN_CACHE_TTL_CLUSTER_ATTRIBUTES', 30)),
+    'networks': int(os.environ.get('NAILGUN_CACHE_TTL_NETWORKS', 30)),
+}
+# Max age in seconds of the nodes list used for lookups of nailgun nodes
+NAILGUN_NODES_REGISTRY_MAX_AGE = float(os.environ.get(
+    'NAILGUN_NODES_REGISTRY_MAX_AGE', 5))
+
 # Create snapshots as last step in test-case
 MAKE_SNAPSHOT = get_var_as_bool('MAKE_SNAPSHOT', False)
+# Replace fixed sleeps on snapshot making/reverting with readiness probes
+FAST_REVERT = get_var_as_bool('FAST_REVERT', False)
 
 FUEL_SETTINGS_YAML = os.environ.get('FUEL_SETTINGS_YAML',
                                     '/etc/fuel/astute.yaml')
@@ -419,6 +467,16 @@ TIMESTAT_PATH_YAML = os.environ.get(
     'TIMESTAT_PATH_YAML', os.path.join(
         LOGS_DIR, 'timestat_{}.yaml'.format(time.strftime("%Y%m%d"))))
 
+# Diagnostic snapshots are downloaded by chunks of DOWNLOAD_CHUNK_SIZE bytes
+# in DOWNLOAD_SEGMENTS parallel HTTP Range requests, every request is
+# resumed up to DOWNLOAD_ATTEMPTS times after network errors
+DOWNLOAD_CHUNK_SIZE = int(os.environ.get('DOWNLOAD_CHUNK_SIZE', 1024 * 1024))
+DOWNLOAD_SEGMENTS = int(os.environ.get('DOWNLOAD_SEGMENTS', 1))
+DOWNLOAD_ATTEMPTS = int(os.environ.get('DOWNLOAD_ATTEMPTS', 5))
+# Pull only logs changed since the previous pull in the same run when the
+# diagnostic snapshot can't be created
+PULL_LOGS_INCREMENTAL = get_var_as_bool('PULL_LOGS_INCREMENTAL', False)
+
 FUEL_PLUGIN_BUILDER_REPO = 'https://github.com/openstack/fuel-plugins.git'
 
 ###############################################################################
@@ -478,11 +536,22 @@ FUEL_USE_LOCAL_DNS = get_var_as_bool('FUEL_USE_LOCAL_DNS', True)
 KEYSTONE_CREDS = {'username': os.environ.get('KEYSTONE_USERNAME', 'admin'),
                   'password': os.environ.get('KEYSTONE_PASSWORD', 'admin'),
                   'tenant_name': os.environ.get('KEYSTONE_TENANT', 'admin')}
+# Keystone token is refreshed KEYSTONE_TOKEN_REFRESH_MARGIN seconds before
+# its expiration. KEYSTONE_TOKEN_DEFAULT_TTL is used if keystone hasn't
+# returned expiration time of the token.
+KEYSTONE_TOKEN_REFRESH_MARGIN = int(os.environ.get(
+    'KEYSTONE_TOKEN_REFRESH_MARGIN', 300))
+KEYSTONE_TOKEN_DEFAULT_TTL = int(os.environ.get(
+    'KEYSTONE_TOKEN_DEFAULT_TTL', 600))
 
 # Default SSH password 'ENV_FUEL_PASSWORD' can be changed on Fuel master node
 SSH_CREDENTIALS = {
     'login': os.environ.get('ENV_FUEL_LOGIN', 'root'),
     'password': os.environ.get('ENV_FUEL_PASSWORD', 'r00tme')}
+# Pooled SSH connections to nodes are closed after being idle for so long
+SSH_POOL_IDLE_TIMEOUT = int(os.environ.get('SSH_POOL_IDLE_TIMEOUT', 300))
+# Seconds to wait for a pooled SSH connection to run a command before reuse
+SSH_POOL_PROBE_TIMEOUT = float(os.environ.get('SSH_POOL_PROBE_TIMEOUT', 5))
 
 ###############################################################################
 